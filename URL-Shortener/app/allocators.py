@@ -0,0 +1,174 @@
+# app/allocators.py
+import random
+import string
+import threading
+from collections import deque
+from typing import Optional
+
+ALPHABET = string.digits + string.ascii_letters
+BASE = len(ALPHABET)
+DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+
+# Affine scramble n -> (n * MULTIPLIER + OFFSET) mod 62^length. MULTIPLIER
+# shares no factor with 62 (= 2 * 31), so the map is a bijection for every
+# length and consecutive counters give unrelated-looking codes. This spreads
+# codes out; it does not make them secret.
+MULTIPLIER = 25214903917
+OFFSET = 11
+
+def encode_base62(number: int, length: int) -> str:
+    """Encode `number` as exactly `length` base62 digits"""
+    digits = []
+    for _ in range(length):
+        number, digit = divmod(number, BASE)
+        digits.append(ALPHABET[digit])
+    return ''.join(reversed(digits))
+
+def decode_base62(code: str) -> Optional[int]:
+    """Inverse of encode_base62; None if `code` has a non-base62 character"""
+    number = 0
+    try:
+        for char in code:
+            number = number * BASE + DIGITS[char]
+    except KeyError:
+        return None
+    return number
+
+class RandomCodeAllocator:
+    """Random codes; the store must check them against existing ones"""
+    
+    collision_free = False
+    name = 'random'
+    
+    def __init__(self, length: int = 6):
+        self.length = length
+    
+    def allocate(self) -> str:
+        return ''.join(random.choices(ALPHABET, k=self.length))
+    
+    def reserve(self, code: str):
+        """Nothing to do: the store checks every random code anyway"""
+
+class CounterCodeAllocator:
+    """Codes derived from a monotonic counter, unique without any lookup.
+    
+    The first 62^min_length counters map to codes of min_length
+    characters, the next 62^(min_length + 1) to one character more, and
+    so on, so codes only grow once a length is used up.
+    """
+    
+    collision_free = True
+    
+    def __init__(self, min_length: int = 6, start: int = 0):
+        self.min_length = min_length
+        self.name = f'counter-{min_length}'  # Codes decode differently for another min_length
+        self._next = start
+        self._lock = threading.Lock()
+        self._tiers = {}  # length -> (62^length, inverse of MULTIPLIER, counters of shorter lengths)
+    
+    @property
+    def allocated(self) -> int:
+        """Number of counters handed out so far"""
+        return self._next
+    
+    def allocate(self) -> str:
+        with self._lock:
+            number = self._next
+            self._next += 1
+        return self.encode(number)
+    
+    def reserve(self, code: str):
+        """Never hand out `code` or any code allocated before it (used when restoring)"""
+        number = self.decode(code)
+        if number is not None:
+            with self._lock:
+                self._next = max(self._next, number + 1)
+    
+    def encode(self, number: int) -> str:
+        """Code for the given counter value"""
+        length = self.min_length
+        size = BASE ** length
+        while number >= size:
+            number -= size
+            length += 1
+            size = BASE ** length
+        return encode_base62((number * MULTIPLIER + OFFSET) % size, length)
+    
+    def decode(self, code: str) -> Optional[int]:
+        """Counter value `code` was encoded from, or None if no counter encodes to it"""
+        length = len(code)
+        value = decode_base62(code)
+        if value is None or length < self.min_length:
+            return None
+        tier = self._tiers.get(length)
+        if tier is None:
+            size = BASE ** length
+            skipped = sum(BASE ** shorter for shorter in range(self.min_length, length))
+            tier = (size, pow(MULTIPLIER, -1, size), skipped)
+            # Only lengths handed out so far are cached, so arbitrary codes cannot grow the cache
+            if length <= len(self.encode(max(self._next - 1, 0))):
+                self._tiers[length] = tier
+        size, inverse, skipped = tier
+        # Undo the scramble, then skip the counters of every shorter length
+        return (value - OFFSET) * inverse % size + skipped
+
+class PooledCodeAllocator:
+    """Hands out codes pre-generated by a background thread.
+    
+    The thread tops the pool back up to `size` whenever it falls below
+    `low_water`, so a shorten request only pops a ready code. If the pool
+    ever runs dry, codes come straight from the source.
+    """
+    
+    def __init__(self, source, size: int = 10000, low_water: int = None):
+        self.source = source
+        self.collision_free = source.collision_free
+        self.name = getattr(source, 'name', type(source).__name__)
+        if hasattr(source, 'decode'):
+            self.encode = source.encode
+            self.decode = source.decode
+        self.size = size
+        self.low_water = size // 2 if low_water is None else low_water
+        self._pool = deque()
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._fill()
+        self._thread = threading.Thread(target=self._run, name='code-pool', daemon=True)
+        self._thread.start()
+    
+    def allocate(self) -> str:
+        try:
+            code = self._pool.popleft()
+        except IndexError:
+            code = self.source.allocate()
+        if len(self._pool) < self.low_water:
+            self._refill.set()
+        return code
+    
+    def reserve(self, code: str):
+        """Reserve `code` in the source and drop pooled codes that may predate it"""
+        with self._lock:
+            self.source.reserve(code)
+            self._pool.clear()
+        self._refill.set()
+    
+    def _fill(self):
+        with self._lock:
+            while len(self._pool) < self.size:
+                self._pool.append(self.source.allocate())
+    
+    def _run(self):
+        while True:
+            self._refill.wait()
+            self._refill.clear()
+            self._fill()
+
+def create_allocator(kind: str = 'counter', length: int = 6, pool_size: int = 10000):
+    """Build an allocator by name: 'counter', 'pool' (pooled counter codes) or 'random'"""
+    if kind == 'counter':
+        return CounterCodeAllocator(length)
+    if kind == 'pool':
+        return PooledCodeAllocator(CounterCodeAllocator(length), pool_size)
+    if kind == 'random':
+        return RandomCodeAllocator(length)
+    raise ValueError(f"Unknown short code allocator: {kind}")
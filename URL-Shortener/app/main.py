@@ -1,12 +1,33 @@
 from flask import Flask, jsonify, request, redirect, abort
-from app.models import URLStore
+from app.allocators import create_allocator
+from app.models import CompactURLStore, URLStore
+from app.persistence import PersistentURLStore
 from app.utils import validate_url, sanitize_url
+import atexit
+import os
 import threading
 
 app = Flask(__name__)
 
-# Global URL store instance
-url_store = URLStore()
+# Global URL store instance; SHORT_CODE_ALLOCATOR is counter (default), pool or random,
+# URL_STORE_COMPACT packs records into arrays for stores with millions of links, and
+# URL_SHORTEN_DEDUP returns the existing code when a URL is shortened again
+store_class = CompactURLStore if os.getenv('URL_STORE_COMPACT', 'false').lower() == 'true' else URLStore
+url_store = store_class(
+    create_allocator(os.getenv('SHORT_CODE_ALLOCATOR', 'counter')),
+    stripes=int(os.getenv('URL_STORE_STRIPES', 16)),
+    dedup=os.getenv('URL_SHORTEN_DEDUP', 'false').lower() == 'true'
+)
+
+# URL_STORE_PATH makes links survive restarts; URL_STORE_DURABILITY is none, batch (default) or sync,
+# and URL_STORE_SYNC_TIMEOUT bounds how long a sync shorten waits for the log
+if os.getenv('URL_STORE_PATH'):
+    url_store = PersistentURLStore(
+        url_store, os.getenv('URL_STORE_PATH'), os.getenv('URL_STORE_DURABILITY', 'batch'),
+        sync_timeout=float(os.getenv('URL_STORE_SYNC_TIMEOUT', 5))
+    )
+    atexit.register(url_store.close)
+    print(f"Recovered {len(url_store)} links in {url_store.recovery_seconds:.2f}s")
 
 @app.route('/')
 def health_check():
@@ -6,53 +6,342 @@
 
 # app/models.py
 import threading
-from datetime import datetime
-from typing import Dict, Optional, Tuple
+from array import array
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from typing import Callable, Dict, Optional, Tuple
+from app.allocators import CounterCodeAllocator
+from app.utils import sanitize_url
 
-class URLStore:
-    """In-memory storage for URL mappings with thread safety"""
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+class _Stripe:
+    """One slice of the store, holding the codes that hash to it.
+    
+    `urls` maps a code to an immutable (url, created_at) tuple, so it can be
+    read without the lock. `lock` serializes inserts and click updates.
+    """
+    
+    __slots__ = ('urls', 'clicks', 'lock')
     
     def __init__(self):
-        self._urls: Dict[str, Dict] = {}
-        self._lock = threading.Lock()
-        self._counter = 0
+        self.urls: Dict[str, Tuple[str, str]] = {}
+        self.clicks: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+class _URLIndex:
+    """Canonical URL -> short code map for deduplicated shortening.
+    
+    Keys are 64-bit blake2b digests of the sanitize_url form rather than
+    the URL itself, so the index never holds a second copy of the string.
+    A hit is confirmed against the stored URL, so a digest collision only
+    costs a fresh code, never a wrong redirect.
+    """
+    
+    def __init__(self, stripes: int):
+        self._stripes = [(threading.Lock(), {}) for _ in range(max(1, stripes))]
+    
+    def _slot(self, url: str):
+        """(canonical url, digest, lock, codes) for `url`"""
+        canonical = sanitize_url(url)
+        key = int.from_bytes(blake2b(canonical.encode('utf-8'), digest_size=8).digest(), 'little')
+        return (canonical, key) + self._stripes[key % len(self._stripes)]
+    
+    @staticmethod
+    def _hit(codes: Dict[int, str], key: int, canonical: str, lookup) -> Optional[str]:
+        short_code = codes.get(key)
+        if short_code is not None:
+            stored = lookup(short_code)
+            if stored is not None and sanitize_url(stored) == canonical:
+                return short_code
+        return None
+    
+    def find(self, url: str, lookup: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Code already holding `url`; `lookup` maps a code to its stored URL"""
+        canonical, key, _, codes = self._slot(url)
+        return self._hit(codes, key, canonical, lookup)
+    
+    def add(self, url: str, lookup: Callable[[str], Optional[str]], insert: Callable[[str], str]) -> str:
+        """Return the code holding `url`, calling `insert` to create one if there is none"""
+        canonical, key, lock, codes = self._slot(url)
+        # Held across the insert, so racing shortens of one URL agree on a code
+        with lock:
+            short_code = self._hit(codes, key, canonical, lookup)
+            if short_code is None:
+                short_code = insert(url)
+                codes.setdefault(key, short_code)
+            return short_code
+    
+    def restore(self, url: str, short_code: str):
+        """Index a recovered link, keeping whichever code was indexed first"""
+        _, key, lock, codes = self._slot(url)
+        with lock:
+            codes.setdefault(key, short_code)
+    
+    def __len__(self) -> int:
+        return sum(len(codes) for _, codes in self._stripes)
+
+class URLStore:
+    """In-memory storage for URL mappings with thread safety.
+    
+    Codes are spread over `stripes` independently locked stripes, so
+    concurrent redirects of different codes rarely wait on each other.
+    With `dedup`, shortening a URL that is already stored returns its
+    existing code.
+    """
+    
+    def __init__(self, allocator=None, stripes: int = 16, dedup: bool = False):
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        # Counter-based codes are unique by construction, so no retry loop
+        self._allocator = allocator or CounterCodeAllocator()
+        self._url_index = _URLIndex(stripes) if dedup else None
+    
+    @property
+    def allocator(self):
+        """Allocator the store takes new codes from"""
+        return self._allocator
+    
+    def _stripe(self, short_code: str) -> _Stripe:
+        return self._stripes[hash(short_code) % len(self._stripes)]
+    
+    def _peek(self, short_code: str) -> Optional[str]:
+        """Stored URL of a code, without counting a click"""
+        record = self._stripe(short_code).urls.get(short_code)
+        return record[0] if record else None
     
     def add_url(self, original_url: str) -> str:
         """Add a new URL and return its short code"""
-        from app.utils import generate_short_code
+        if self._url_index is not None:
+            return self._url_index.add(original_url, self._peek, self._insert)
+        return self._insert(original_url)
+    
+    def find_url(self, original_url: str) -> Optional[str]:
+        """Existing code for `original_url` in dedup mode, else None"""
+        if self._url_index is None:
+            return None
+        return self._url_index.find(original_url, self._peek)
+    
+    def _insert(self, original_url: str) -> str:
+        record = (original_url, datetime.utcnow().isoformat())
+        while True:
+            short_code = self._allocator.allocate()
+            stripe = self._stripe(short_code)
+            with stripe.lock:
+                if self._allocator.collision_free or short_code not in stripe.urls:
+                    # Clicks first, so a reader that finds the URL finds its counter
+                    stripe.clicks[short_code] = 0
+                    stripe.urls[short_code] = record
+                    return short_code
+    
+    def get_url(self, short_code: str) -> Optional[str]:
+        """Get original URL and increment click count"""
+        stripe = self._stripe(short_code)
+        record = stripe.urls.get(short_code)
+        if record is None:
+            return None
+        with stripe.lock:
+            stripe.clicks[short_code] += 1
+        return record[0]
+    
+    def get_stats(self, short_code: str) -> Optional[Dict]:
+        """Get analytics for a short code"""
+        stripe = self._stripe(short_code)
+        record = stripe.urls.get(short_code)
+        if record is None:
+            return None
+        return {
+            'url': record[0],
+            'clicks': stripe.clicks[short_code],
+            'created_at': record[1]
+        }
+    
+    def url_exists(self, short_code: str) -> bool:
+        """Check if a short code exists"""
+        return short_code in self._stripe(short_code).urls
+    
+    def __len__(self) -> int:
+        return sum(len(stripe.urls) for stripe in self._stripes)
+    
+    def restore(self, short_code: str, original_url: str, created_micros: int, clicks: int = 0):
+        """Insert a recovered link (created_at in epoch microseconds) unless already present"""
+        stripe = self._stripe(short_code)
+        with stripe.lock:
+            if short_code not in stripe.urls:
+                stripe.clicks[short_code] = clicks
+                stripe.urls[short_code] = (original_url, (_EPOCH + created_micros * _MICROSECOND).isoformat())
+        if self._url_index is not None:
+            self._url_index.restore(original_url, short_code)
+        self._allocator.reserve(short_code)
+    
+    def restore_clicks(self, short_code: str, clicks: int):
+        """Raise a recovered link's click count to `clicks`"""
+        stripe = self._stripe(short_code)
+        with stripe.lock:
+            if short_code in stripe.clicks:
+                stripe.clicks[short_code] = max(stripe.clicks[short_code], clicks)
+    
+    def export(self):
+        """Yield (short_code, url, created_micros, clicks) for every link"""
+        for stripe in self._stripes:
+            with stripe.lock:
+                entries = [(code, record, stripe.clicks[code]) for code, record in stripe.urls.items()]
+            for code, (url, created_at), clicks in entries:
+                yield code, url, (datetime.fromisoformat(created_at) - _EPOCH) // _MICROSECOND, clicks
+
+class CompactURLStore:
+    """URLStore with records packed into flat arrays instead of objects.
+    
+    URLs sit back to back in one UTF-8 buffer; each row has a start and
+    length in that buffer, a click count and a creation time in epoch
+    microseconds, all in typed arrays. With the counter allocator a code
+    decodes to its counter, which is used as the row, so no per-code index
+    is kept at all; other allocators keep a code -> row dict. Rows are
+    published by writing the creation time last, so lookups take no lock,
+    and click counts are locked by stripe of row.
+    """
+    
+    def __init__(self, allocator=None, stripes: int = 16, dedup: bool = False):
+        self._allocator = allocator or CounterCodeAllocator()
+        self._url_index = _URLIndex(stripes) if dedup else None
+        self._decode = getattr(self._allocator, 'decode', None)
+        self._index: Optional[Dict[str, int]] = None if self._decode else {}
+        self._buffer = bytearray()
+        self._starts = array('Q')
+        self._lengths = array('L')
+        self._clicks = array('Q')
+        self._created = array('q')  # 0 marks a row that holds no URL
+        self._count = 0
+        self._write_lock = threading.Lock()
+        self._click_locks = [threading.Lock() for _ in range(max(1, stripes))]
+    
+    @property
+    def allocator(self):
+        """Allocator the store takes new codes from"""
+        return self._allocator
+    
+    def _grow(self, rows: int):
+        """Extend every column with empty rows until it holds `rows` rows"""
+        missing = rows - len(self._created)
+        if missing > 0:
+            for column in (self._starts, self._lengths, self._clicks, self._created):
+                column.frombytes(bytes(missing * column.itemsize))
+    
+    def _row(self, short_code: str) -> Optional[int]:
+        if self._index is not None:
+            return self._index.get(short_code)
+        # No stored code is longer than the last row's, and decoding a long one costs big-int work
+        if len(short_code) > len(self._allocator.encode(max(len(self._created) - 1, 0))):
+            return None
+        row = self._decode(short_code)
+        if row is None or row >= len(self._created) or not self._created[row]:
+            return None
+        return row
+    
+    def _url(self, row: int) -> str:
+        start = self._starts[row]
+        return self._buffer[start:start + self._lengths[row]].decode('utf-8')
+    
+    def _peek(self, short_code: str) -> Optional[str]:
+        """Stored URL of a code, without counting a click"""
+        row = self._row(short_code)
+        return None if row is None else self._url(row)
+    
+    def add_url(self, original_url: str) -> str:
+        """Add a new URL and return its short code"""
+        if self._url_index is not None:
+            return self._url_index.add(original_url, self._peek, self._insert)
+        return self._insert(original_url)
+    
+    def find_url(self, original_url: str) -> Optional[str]:
+        """Existing code for `original_url` in dedup mode, else None"""
+        if self._url_index is None:
+            return None
+        return self._url_index.find(original_url, self._peek)
+    
+    def _insert(self, original_url: str) -> str:
+        data = original_url.encode('utf-8')
+        created = (datetime.utcnow() - _EPOCH) // _MICROSECOND
+        short_code = self._allocator.allocate()
+        # Codes can arrive out of counter order; rows in between stay empty until theirs arrive
+        row = self._decode(short_code) if self._decode else None
         
-        with self._lock:
-            # Generate a unique short code
-            while True:
-                short_code = generate_short_code()
-                if short_code not in self._urls:
-                    break
-            
-            # Store the URL mapping
-            self._urls[short_code] = {
-                'url': original_url,
-                'clicks': 0,
-                'created_at': datetime.utcnow().isoformat()
-            }
-            
-            return short_code
+        with self._write_lock:
+            if row is None:
+                if not self._allocator.collision_free:
+                    while short_code in self._index:
+                        short_code = self._allocator.allocate()
+                row = self._index[short_code] = len(self._created)
+            self._fill_row(row, data, created, 0)
+        return short_code
+    
+    def _fill_row(self, row: int, data: bytes, created: int, clicks: int):
+        """Write a row's columns; the caller holds the write lock"""
+        self._grow(row + 1)
+        self._starts[row] = len(self._buffer)
+        self._lengths[row] = len(data)
+        self._buffer += data
+        self._clicks[row] = clicks
+        self._created[row] = created
+        self._count += 1
     
     def get_url(self, short_code: str) -> Optional[str]:
         """Get original URL and increment click count"""
-        with self._lock:
-            if short_code in self._urls:
-                self._urls[short_code]['clicks'] += 1
-                return self._urls[short_code]['url']
+        row = self._row(short_code)
+        if row is None:
             return None
+        with self._click_locks[row % len(self._click_locks)]:
+            self._clicks[row] += 1
+        return self._url(row)
     
     def get_stats(self, short_code: str) -> Optional[Dict]:
         """Get analytics for a short code"""
-        with self._lock:
-            if short_code in self._urls:
-                return self._urls[short_code].copy()
+        row = self._row(short_code)
+        if row is None:
             return None
+        return {
+            'url': self._url(row),
+            'clicks': self._clicks[row],
+            'created_at': (_EPOCH + self._created[row] * _MICROSECOND).isoformat()
+        }
     
     def url_exists(self, short_code: str) -> bool:
         """Check if a short code exists"""
-        with self._lock:
-            return short_code in self._urls
\ No newline at end of file
+        return self._row(short_code) is not None
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def restore(self, short_code: str, original_url: str, created_micros: int, clicks: int = 0):
+        """Insert a recovered link (created_at in epoch microseconds) unless already present"""
+        row = self._decode(short_code) if self._decode else None
+        with self._write_lock:
+            if row is None:
+                if short_code in self._index:
+                    return
+                row = self._index[short_code] = len(self._created)
+            elif row < len(self._created) and self._created[row]:
+                return
+            self._fill_row(row, original_url.encode('utf-8'), created_micros, clicks)
+        if self._url_index is not None:
+            self._url_index.restore(original_url, short_code)
+        self._allocator.reserve(short_code)
+    
+    def restore_clicks(self, short_code: str, clicks: int):
+        """Raise a recovered link's click count to `clicks`"""
+        row = self._row(short_code)
+        if row is not None:
+            with self._click_locks[row % len(self._click_locks)]:
+                self._clicks[row] = max(self._clicks[row], clicks)
+    
+    def export(self):
+        """Yield (short_code, url, created_micros, clicks) for every link"""
+        if self._index is not None:
+            with self._write_lock:
+                rows = sorted((row, code) for code, row in self._index.items())
+        else:
+            rows = ((row, None) for row in range(len(self._created)))
+        for row, code in rows:
+            created = self._created[row]
+            if created:
+                yield code or self._allocator.encode(row), self._url(row), created, self._clicks[row]
@@ -0,0 +1,398 @@
+# app/persistence.py
+"""
+Durable storage for a URL store: an append-only log plus snapshots.
+
+Every new link is appended to the current log segment as a create record.
+Clicks are only noted in memory; at each flush one record per clicked code
+is appended, carrying the code's click total at that moment. A flusher
+thread writes the buffered records every `flush_interval` seconds and,
+depending on `durability`, fsyncs them:
+
+- 'none':  written to the OS without fsync; a process crash loses the
+           records of the last interval, and an OS crash or power loss
+           loses whatever the OS had not written back yet
+- 'batch': fsynced on every flush; any crash loses at most one interval
+- 'sync':  add_url() returns only once its record is fsynced (concurrent
+           requests share one fsync), and raises TimeoutError if that
+           takes longer than `sync_timeout`; clicks are still batched
+
+Once the current segment grows past `snapshot_bytes`, the log is rotated
+and the whole store is written to a snapshot, which makes every older
+segment redundant. Startup memory-maps the snapshot, loads it and replays
+the newer segments. Click records hold totals rather than deltas, so
+replaying one that the snapshot already counts changes nothing, and
+snapshots never need to pause writers.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
+
+DURABILITY_LEVELS = ('none', 'batch', 'sync')
+SNAPSHOT_NAME = 'snapshot.bin'
+ALLOCATOR_NAME = 'allocator'  # Names the allocator the stored codes came from
+SNAPSHOT_MAGIC = b'URLSNAP1'
+
+# Snapshot: header, then four columns (created_at micros, clicks, code
+# lengths, URL lengths), then all codes and all URLs back to back
+_SNAPSHOT_HEADER = struct.Struct('<8sQQ')  # magic, first segment not included, entries
+_SNAPSHOT_COLUMNS = ('q', 'Q', 'B', 'I')
+
+# Log record: kind and payload length, payload, CRC32 of the payload
+_RECORD_HEADER = struct.Struct('<cI')
+_CRC = struct.Struct('<I')
+_CREATE = struct.Struct('<qB')  # created_at micros, code length; then code and URL
+_CLICKS = struct.Struct('<Q')  # click total; then code
+CREATE = b'C'
+CLICKS = b'K'
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _segment_name(segment: int) -> str:
+    return f'log.{segment:08d}'
+
+def _record(kind: bytes, payload: bytes) -> bytes:
+    return _RECORD_HEADER.pack(kind, len(payload)) + payload + _CRC.pack(zlib.crc32(payload))
+
+def _fsync_directory(directory: str):
+    """Make a rename or new file in `directory` survive a power loss"""
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def replay_log(store, data) -> int:
+    """Apply the log records in `data` to `store`.
+    
+    Stops at the first torn or corrupt record (the tail of a crashed
+    write) and returns the offset just past the last intact one.
+    """
+    offset = 0
+    end = len(data)
+    while offset + _RECORD_HEADER.size <= end:
+        kind, length = _RECORD_HEADER.unpack_from(data, offset)
+        start = offset + _RECORD_HEADER.size
+        stop = start + length
+        if stop + _CRC.size > end:
+            break
+        payload = data[start:stop]
+        if zlib.crc32(payload) != _CRC.unpack_from(data, stop)[0]:
+            break
+        
+        if kind == CREATE:
+            created, code_length = _CREATE.unpack_from(payload)
+            code_end = _CREATE.size + code_length
+            store.restore(payload[_CREATE.size:code_end].decode('ascii'),
+                          payload[code_end:].decode('utf-8'), created)
+        elif kind == CLICKS:
+            clicks, = _CLICKS.unpack_from(payload)
+            store.restore_clicks(payload[_CLICKS.size:].decode('ascii'), clicks)
+        else:
+            break
+        offset = stop + _CRC.size
+    return offset
+
+def write_snapshot(path: str, entries, next_segment: int) -> int:
+    """Atomically write (code, url, created_micros, clicks) entries; returns how many"""
+    columns = [array(typecode) for typecode in _SNAPSHOT_COLUMNS]
+    created, clicks, code_lengths, url_lengths = columns
+    codes = bytearray()
+    urls = bytearray()
+    for code, url, created_micros, click_count in entries:
+        code_bytes = code.encode('ascii')
+        url_bytes = url.encode('utf-8')
+        created.append(created_micros)
+        clicks.append(click_count)
+        code_lengths.append(len(code_bytes))
+        url_lengths.append(len(url_bytes))
+        codes += code_bytes
+        urls += url_bytes
+    
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as snapshot:
+        snapshot.write(_SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, next_segment, len(created)))
+        for column in columns:
+            column.tofile(snapshot)
+        snapshot.write(codes)
+        snapshot.write(urls)
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary, path)
+    _fsync_directory(os.path.dirname(path))
+    return len(created)
+
+def load_snapshot(path: str, store) -> int:
+    """Load a snapshot into `store`; returns the first log segment it does not cover"""
+    with open(path, 'rb') as snapshot:
+        with mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, next_segment, count = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a URL store snapshot")
+            
+            offset = _SNAPSHOT_HEADER.size
+            columns = []
+            for typecode in _SNAPSHOT_COLUMNS:
+                column = array(typecode)
+                size = count * column.itemsize
+                column.frombytes(data[offset:offset + size])
+                columns.append(column)
+                offset += size
+            created, clicks, code_lengths, url_lengths = columns
+            codes_size = sum(code_lengths)
+            if offset + codes_size + sum(url_lengths) != len(data):
+                raise ValueError(f"{path} is truncated or corrupt")
+            
+            codes = data[offset:offset + codes_size].decode('ascii')
+            offset += codes_size
+            code_start = 0
+            for i in range(count):
+                code_end = code_start + code_lengths[i]
+                url_end = offset + url_lengths[i]
+                store.restore(codes[code_start:code_end], data[offset:url_end].decode('utf-8'),
+                              created[i], clicks[i])
+                code_start = code_end
+                offset = url_end
+    return next_segment
+
+class PersistentURLStore:
+    """Wraps a URLStore or CompactURLStore and makes its links and clicks durable.
+    
+    Offers the same API as the wrapped store, plus snapshot() and close().
+    """
+    
+    def __init__(self, store, directory: str, durability: str = 'batch',
+                 flush_interval: float = 0.05, snapshot_bytes: int = 64 * 1024 * 1024,
+                 sync_timeout: float = 5.0):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level: {durability}")
+        self._store = store
+        self.directory = directory
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.snapshot_bytes = snapshot_bytes
+        self.sync_timeout = sync_timeout
+        
+        self._buffer = bytearray()
+        self._appended = 0  # Records added to the buffer so far
+        self._written = 0  # Of those, records written (and synced, per durability)
+        self._buffer_lock = threading.Lock()
+        self._written_cond = threading.Condition(self._buffer_lock)
+        self._click_stripes = [(threading.Lock(), set()) for _ in range(16)]
+        self._flush_lock = threading.Lock()  # One flush or rotation at a time
+        self._snapshot_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._snapshotting = False
+        self._torn = False  # A failed write may have left part of a record behind
+        self._closed = False
+        
+        os.makedirs(directory, exist_ok=True)
+        self._check_allocator()
+        start = time.perf_counter()
+        self._segment = self._recover()
+        self.recovery_seconds = time.perf_counter() - start
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name='url-log', daemon=True)
+        self._thread.start()
+    
+    def _check_allocator(self):
+        """Refuse a directory whose codes came from a different kind of allocator.
+        
+        Restored codes are reserved with the allocator, and the compact
+        store keeps counter codes at their decoded row, so codes from
+        another allocator would push the counter and the row count into
+        the billions.
+        """
+        allocator = self._store.allocator
+        name = getattr(allocator, 'name', type(allocator).__name__)
+        path = os.path.join(self.directory, ALLOCATOR_NAME)
+        if os.path.exists(path):
+            with open(path) as marker:
+                stored = marker.read().strip()
+            if stored != name:
+                raise ValueError(f"{self.directory} holds codes from the {stored!r} allocator, not {name!r}")
+            return
+        with open(path, 'w') as marker:
+            marker.write(name + '\n')
+            marker.flush()
+            os.fsync(marker.fileno())
+        _fsync_directory(self.directory)
+    
+    def _recover(self) -> int:
+        """Load the snapshot, replay newer segments and return the segment to append to"""
+        next_segment = 0
+        snapshot = os.path.join(self.directory, SNAPSHOT_NAME)
+        if os.path.exists(snapshot):
+            next_segment = load_snapshot(snapshot, self._store)
+        
+        segments = sorted(
+            int(name[4:]) for name in os.listdir(self.directory)
+            if name.startswith('log.') and name[4:].isdigit()
+        )
+        for segment in segments:
+            path = os.path.join(self.directory, _segment_name(segment))
+            if segment < next_segment:
+                os.remove(path)  # Already folded into the snapshot
+                continue
+            next_segment = segment
+            with open(path, 'r+b') as log:
+                size = os.fstat(log.fileno()).st_size
+                if not size:
+                    continue
+                with mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    intact = replay_log(self._store, data)
+                if intact < size:
+                    log.truncate(intact)  # Drop the torn tail of a crashed write
+        return next_segment
+    
+    def _open_segment(self):
+        # Unbuffered, so a failed write leaves nothing behind to be written later
+        self._log = open(os.path.join(self.directory, _segment_name(self._segment)), 'ab', buffering=0)
+        self._segment_bytes = self._log.tell()
+        self._torn = False
+    
+    def _append(self, record: bytes) -> int:
+        with self._buffer_lock:
+            self._buffer += record
+            self._appended += 1
+            return self._appended
+    
+    def add_url(self, original_url: str) -> str:
+        """Add a new URL and return its short code"""
+        short_code = self._store.find_url(original_url)
+        if short_code is not None:
+            # Deduplicated: the link is logged already, at the latest by the last record appended
+            with self._buffer_lock:
+                sequence = self._appended
+        else:
+            short_code = self._store.add_url(original_url)
+            created_at = datetime.fromisoformat(self._store.get_stats(short_code)['created_at'])
+            created_micros = (created_at - _EPOCH) // _MICROSECOND
+            code = short_code.encode('ascii')
+            sequence = self._append(_record(
+                CREATE, _CREATE.pack(created_micros, len(code)) + code + original_url.encode('utf-8')
+            ))
+        if self.durability == 'sync':
+            self._wake.set()
+            with self._written_cond:
+                # A write that keeps failing (disk full) must not hang the request; the
+                # record stays buffered and is written once the flusher succeeds
+                if not self._written_cond.wait_for(
+                    lambda: self._written >= sequence or self._closed, self.sync_timeout
+                ):
+                    raise TimeoutError(f"URL log not written within {self.sync_timeout}s")
+        return short_code
+    
+    def get_url(self, short_code: str):
+        """Get original URL and increment click count"""
+        url = self._store.get_url(short_code)
+        if url is not None:
+            lock, clicked = self._click_stripes[hash(short_code) % len(self._click_stripes)]
+            with lock:
+                clicked.add(short_code)
+        return url
+    
+    def get_stats(self, short_code: str):
+        """Get analytics for a short code"""
+        return self._store.get_stats(short_code)
+    
+    def url_exists(self, short_code: str) -> bool:
+        """Check if a short code exists"""
+        return self._store.url_exists(short_code)
+    
+    def __len__(self) -> int:
+        return len(self._store)
+    
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if self._segment_bytes >= self.snapshot_bytes and not self._snapshotting:
+                self._snapshotting = True
+                threading.Thread(target=self.snapshot, name='url-snapshot', daemon=True).start()
+    
+    def flush(self):
+        """Write buffered records and click totals to the log now"""
+        with self._flush_lock:
+            self._flush()
+    
+    def _flush(self):
+        for lock, clicked in self._click_stripes:
+            with lock:
+                codes = list(clicked)
+                clicked.clear()
+            for code in codes:
+                code_bytes = code.encode('ascii')
+                self._append(_record(CLICKS, _CLICKS.pack(self._store.get_stats(code)['clicks']) + code_bytes))
+        
+        with self._buffer_lock:
+            data = self._buffer
+            sequence = self._appended
+            self._buffer = bytearray()
+        if data:
+            try:
+                if self._torn:
+                    # Cut the partial records off, or replay would stop at them
+                    os.ftruncate(self._log.fileno(), self._segment_bytes)
+                    self._torn = False
+                view = memoryview(data)
+                while view:
+                    view = view[self._log.write(view):]
+                if self.durability != 'none':
+                    os.fsync(self._log.fileno())
+            except OSError as e:
+                print(f"URL log write failed, will retry: {e}")
+                self._torn = True
+                with self._buffer_lock:
+                    self._buffer[:0] = data
+                return
+            self._segment_bytes += len(data)
+        with self._written_cond:
+            self._written = sequence
+            self._written_cond.notify_all()
+    
+    def snapshot(self) -> int:
+        """Write every link to a fresh snapshot and drop the log it replaces; returns the link count"""
+        with self._snapshot_lock:
+            try:
+                return self._snapshot()
+            finally:
+                self._snapshotting = False
+    
+    def _snapshot(self) -> int:
+        # Rotate first: everything logged before lands in the old segments
+        # and is in the store the snapshot is taken from
+        with self._flush_lock:
+            self._flush()
+            self._log.close()
+            self._segment += 1
+            self._open_segment()
+            next_segment = self._segment
+        
+        count = write_snapshot(
+            os.path.join(self.directory, SNAPSHOT_NAME), self._store.export(), next_segment
+        )
+        for name in os.listdir(self.directory):
+            if name.startswith('log.') and name[4:].isdigit() and int(name[4:]) < next_segment:
+                os.remove(os.path.join(self.directory, name))
+        return count
+    
+    def close(self):
+        """Flush everything and stop the flusher thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        with self._flush_lock:
+            self._flush()
+            self._log.close()
+        with self._written_cond:
+            self._written_cond.notify_all()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Redirect contention benchmark.
+
+Fills a URLStore, then has several threads hammer get_url() (the redirect
+path) on random codes while a share of operations shortens new URLs, and
+prints operations/second for every stripe and thread count. With one
+stripe every click and insert queues on the same lock; with more, threads
+mostly lock different stripes. Under the GIL the gain is bounded by fewer
+lock handoffs; free-threaded builds can scale further.
+
+Usage: python benchmarks/bench_contention.py [--urls N] [--ops N] [--stripes 1,16,64] [--threads 1,4,16] [--write-ratio R]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import URLStore
+
+def run(stripes, threads, urls, ops_per_thread, write_ratio):
+    store = URLStore(stripes=stripes)
+    codes = [store.add_url(f'https://example.com/{i}') for i in range(urls)]
+    barrier = threading.Barrier(threads + 1)
+    
+    def worker(seed):
+        rng = random.Random(seed)
+        plan = [(rng.random() < write_ratio, rng.choice(codes)) for _ in range(ops_per_thread)]
+        barrier.wait()
+        for write, code in plan:
+            if write:
+                store.add_url('https://example.com/new')
+            else:
+                store.get_url(code)
+    
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = threads * ops_per_thread
+    print(f"stripes {stripes:>4}  threads {threads:>3}  {total / elapsed:>12.0f} ops/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=100000)
+    parser.add_argument('--ops', type=int, default=200000, help='operations in total, split across the threads')
+    parser.add_argument('--stripes', default='1,16,64')
+    parser.add_argument('--threads', default='1,4,16')
+    parser.add_argument('--write-ratio', type=float, default=0.05, help='share of operations that shorten')
+    args = parser.parse_args()
+    
+    for stripes in map(int, args.stripes.split(',')):
+        for threads in map(int, args.threads.split(',')):
+            run(stripes, threads, args.urls, args.ops // threads, args.write_ratio)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Shorten latency benchmark.
+
+Fills a URLStore with --urls links through each allocator and prints the
+mean add_url() latency for every tenth of the fill. Counter and pooled
+codes need no collision check, so latency stays flat as the store grows;
+random codes of --random-length characters retry more and more as their
+keyspace fills up.
+
+A full 10M run (--urls 10000000) holds every record in memory, so it
+needs several GB of RAM.
+
+Usage: python benchmarks/bench_shorten.py [--urls N] [--allocators counter,pool,random] [--random-length N]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.allocators import RandomCodeAllocator, create_allocator
+from app.models import URLStore
+
+def run(name, allocator, urls):
+    store = URLStore(allocator)
+    step = max(1, urls // 10)
+    url = 'https://www.example.com/some/long/path'
+    print(f"{name}")
+    gc.disable()  # Keep collector pauses out of the per-decile numbers
+    try:
+        for decile in range(0, urls, step):
+            count = min(step, urls - decile)
+            start = time.perf_counter()
+            for _ in range(count):
+                code = store.add_url(url)
+            elapsed = time.perf_counter() - start
+            print(f"  {decile:>10} - {decile + count:<10} {elapsed / count * 1e6:>8.2f} us/shorten  last code {code}")
+    finally:
+        gc.enable()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--urls', type=int, default=1000000)
+    parser.add_argument('--allocators', default='counter,pool,random')
+    parser.add_argument('--random-length', type=int, default=4, help='code length of the random allocator')
+    args = parser.parse_args()
+    
+    for name in args.allocators.split(','):
+        if name == 'random':
+            allocator = RandomCodeAllocator(args.random_length)
+        else:
+            allocator = create_allocator(name)
+        run(name, allocator, args.urls)
+        gc.collect()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import pytest
+import threading
+from app.allocators import (
+    CounterCodeAllocator, PooledCodeAllocator, RandomCodeAllocator, create_allocator
+)
+from app.models import URLStore
+
+def test_counter_codes_are_unique():
+    """Test counter codes never repeat and keep the minimum length"""
+    allocator = CounterCodeAllocator()
+    codes = [allocator.allocate() for _ in range(100000)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 6 and code.isalnum() for code in codes)
+
+def test_counter_codes_grow_when_length_is_used_up():
+    """Test codes get longer only after every shorter code is taken"""
+    allocator = CounterCodeAllocator(min_length=1)
+    codes = [allocator.allocate() for _ in range(62 + 62 ** 2 + 1)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 1 for code in codes[:62])
+    assert all(len(code) == 2 for code in codes[62:62 + 62 ** 2])
+    assert len(codes[-1]) == 3
+
+def test_pooled_codes_are_unique_across_threads():
+    """Test the pool hands every code out once under concurrency"""
+    allocator = PooledCodeAllocator(CounterCodeAllocator(), size=100)
+    codes = []
+    lock = threading.Lock()
+    
+    def worker():
+        local = [allocator.allocate() for _ in range(2000)]
+        with lock:
+            codes.extend(local)
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(codes)) == len(codes) == 16000
+
+def test_store_retries_random_collisions():
+    """Test random codes are checked against existing ones"""
+    store = URLStore(RandomCodeAllocator(length=1))
+    codes = {store.add_url(f'https://example.com/{i}') for i in range(62)}
+    assert len(codes) == 62
+
+def test_unknown_allocator():
+    """Test an unknown allocator name is rejected"""
+    with pytest.raises(ValueError):
+        create_allocator('sequential')
@@ -0,0 +1,164 @@
+import os
+import time
+import pytest
+from app.allocators import RandomCodeAllocator
+from app.models import CompactURLStore, URLStore
+from app.persistence import PersistentURLStore, replay_log
+
+@pytest.mark.parametrize('store_class', [URLStore, CompactURLStore])
+def test_links_and_clicks_survive_restart(tmp_path, store_class):
+    """Test a reopened store has every link, click count and creation time"""
+    store = PersistentURLStore(store_class(), str(tmp_path))
+    codes = [store.add_url(f'https://example.com/{i}') for i in range(100)]
+    for code in codes[:10]:
+        store.get_url(code)
+    stats = {code: store.get_stats(code) for code in codes}
+    store.close()
+    
+    store = PersistentURLStore(store_class(), str(tmp_path))
+    assert len(store) == 100
+    assert {code: store.get_stats(code) for code in codes} == stats
+    assert store.add_url('https://example.com/new') not in codes
+    store.close()
+
+def test_snapshot_replaces_old_segments(tmp_path):
+    """Test a snapshot folds the log away and recovery still sees later writes"""
+    store = PersistentURLStore(URLStore(), str(tmp_path))
+    first = store.add_url('https://example.com/first')
+    store.get_url(first)
+    assert store.snapshot() == 1
+    second = store.add_url('https://example.com/second')
+    store.close()
+    assert sorted(os.listdir(tmp_path)) == ['allocator', 'log.00000001', 'snapshot.bin']
+    
+    store = PersistentURLStore(URLStore(), str(tmp_path))
+    assert store.get_stats(first)['clicks'] == 1
+    assert store.get_url(second) == 'https://example.com/second'
+    store.close()
+
+def test_torn_tail_is_dropped(tmp_path):
+    """Test a half-written last record is ignored and truncated away"""
+    store = PersistentURLStore(URLStore(), str(tmp_path), durability='sync')
+    code = store.add_url('https://example.com/kept')
+    store.close()
+    with open(tmp_path / 'log.00000000', 'ab') as log:
+        log.write(b'C\x40\x00\x00\x00partial')
+    
+    store = PersistentURLStore(URLStore(), str(tmp_path))
+    assert len(store) == 1
+    assert store.get_url(code) == 'https://example.com/kept'
+    store.close()
+    assert os.path.getsize(tmp_path / 'log.00000000') < 100
+
+class _FailingLog:
+    """Log file whose next `failures` writes store about half of their data, then fail"""
+    
+    def __init__(self, log, failures=1):
+        self._log = log
+        self.failures = failures
+    
+    def write(self, data):
+        if self.failures:
+            self.failures -= 1
+            self._log.write(bytes(data[:len(data) // 2 + 3]))  # Ends inside a record
+            raise OSError('No space left on device')
+        return self._log.write(data)
+    
+    def __getattr__(self, name):
+        return getattr(self._log, name)
+
+def test_failed_write_is_retried_without_a_torn_record(tmp_path):
+    """Test a write that fails halfway is cut off before the retry"""
+    store = PersistentURLStore(URLStore(), str(tmp_path), flush_interval=60)
+    first = store.add_url('https://example.com/first')
+    store.flush()
+    store._log = _FailingLog(store._log)
+    codes = [store.add_url(f'https://example.com/{i}') for i in range(10)]
+    store.flush()
+    store.flush()
+    store.close()
+    
+    store = PersistentURLStore(URLStore(), str(tmp_path))
+    assert len(store) == 11
+    assert store.get_url(first) == 'https://example.com/first'
+    assert all(store.get_url(code) == f'https://example.com/{i}' for i, code in enumerate(codes))
+    store.close()
+
+def test_sync_add_is_on_disk_before_returning(tmp_path):
+    """Test sync durability writes the record before add_url returns"""
+    store = PersistentURLStore(URLStore(), str(tmp_path), durability='sync')
+    code = store.add_url('https://example.com/synced')
+    reader = URLStore()
+    with open(tmp_path / 'log.00000000', 'rb') as log:
+        replay_log(reader, log.read())
+    assert reader.get_url(code) == 'https://example.com/synced'
+    store.close()
+
+def test_sync_add_gives_up_while_writes_fail(tmp_path):
+    """Test sync durability raises instead of hanging when the log cannot be written"""
+    store = PersistentURLStore(URLStore(), str(tmp_path), durability='sync', sync_timeout=0.2)
+    failing = store._log = _FailingLog(store._log, failures=10 ** 6)
+    with pytest.raises(TimeoutError):
+        store.add_url('https://example.com/unwritten')
+    
+    # Once the disk has room again the buffered record is written after all
+    failing.failures = 0
+    code = store.add_url('https://example.com/written')
+    store.close()
+    store = PersistentURLStore(URLStore(), str(tmp_path))
+    assert len(store) == 2
+    assert store.get_url(code) == 'https://example.com/written'
+    store.close()
+
+def test_unknown_durability(tmp_path):
+    """Test an unknown durability level is rejected"""
+    with pytest.raises(ValueError):
+        PersistentURLStore(URLStore(), str(tmp_path), durability='always')
+
+@pytest.mark.parametrize('links', [
+    50000,
+    # A million links take about 20 s to build and recover; URL_STORE_FULL_SCALE_TESTS=1 runs it
+    pytest.param(1000000, marks=pytest.mark.skipif(
+        os.getenv('URL_STORE_FULL_SCALE_TESTS') != '1', reason='set URL_STORE_FULL_SCALE_TESTS=1 to run'
+    )),
+])
+def test_recovery_time_per_link(tmp_path, links):
+    """Test startup recovery from a snapshot stays well under 60 us per link"""
+    store = PersistentURLStore(URLStore(), str(tmp_path), durability='none')
+    for i in range(links):
+        store.add_url(f'https://example.com/articles/{i}')
+    store.snapshot()
+    store.close()
+    
+    start = time.perf_counter()
+    store = PersistentURLStore(URLStore(), str(tmp_path))
+    elapsed = time.perf_counter() - start
+    print(f"recovered {len(store)} links in {elapsed:.2f}s ({elapsed / links * 1e6:.1f} us/link)")
+    assert len(store) == links
+    assert elapsed < links * 60e-6
+    store.close()
+
+def test_dedup_index_is_rebuilt_on_recovery(tmp_path):
+    """Test a recovered dedup store still returns existing codes without logging them twice"""
+    store = PersistentURLStore(URLStore(dedup=True), str(tmp_path))
+    code = store.add_url('https://example.com/page')
+    assert store.add_url('https://example.com/page') == code
+    store.close()
+    size = os.path.getsize(tmp_path / 'log.00000000')
+    
+    store = PersistentURLStore(URLStore(dedup=True), str(tmp_path))
+    assert store.add_url('https://example.com/page') == code
+    store.close()
+    assert os.path.getsize(tmp_path / 'log.00000000') == size
+
+def test_codes_from_another_allocator_are_refused(tmp_path):
+    """Test random codes are not loaded into a counter-based compact store"""
+    store = PersistentURLStore(URLStore(RandomCodeAllocator()), str(tmp_path))
+    store.add_url('https://example.com/random')
+    store.close()
+    
+    with pytest.raises(ValueError, match='random'):
+        PersistentURLStore(CompactURLStore(), str(tmp_path))
+    store = PersistentURLStore(CompactURLStore(RandomCodeAllocator()), str(tmp_path))
+    assert len(store) == 1
+    store.close()
@@ -0,0 +1,142 @@
+import pytest
+import sys
+import threading
+from app.models import CompactURLStore, URLStore
+
+def test_concurrent_clicks_are_all_counted():
+    """Test click counters stay exact when many threads redirect at once"""
+    store = URLStore(stripes=4)
+    codes = [store.add_url(f'https://example.com/{i}') for i in range(20)]
+    
+    def worker():
+        for _ in range(500):
+            for code in codes:
+                assert store.get_url(code) is not None
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(store.get_stats(code)['clicks'] == 4000 for code in codes)
+    assert len(store) == 20
+
+def test_single_stripe_store():
+    """Test a store with one stripe behaves the same"""
+    store = URLStore(stripes=1)
+    code = store.add_url('https://example.com')
+    assert store.url_exists(code)
+    assert store.get_url(code) == 'https://example.com'
+    assert store.get_stats(code)['clicks'] == 1
+    assert store.get_stats('missing') is None
+    assert store.get_url('missing') is None
+
+def _dict_store_size(store):
+    """Bytes held by a URLStore: stripe dicts plus every key, record and string"""
+    size = 0
+    for stripe in store._stripes:
+        size += sys.getsizeof(stripe.urls) + sys.getsizeof(stripe.clicks)
+        for code, record in stripe.urls.items():
+            size += sys.getsizeof(code) + sys.getsizeof(record) + sum(map(sys.getsizeof, record))
+    return size
+
+def _compact_store_size(store):
+    """Bytes held by a CompactURLStore's buffer and columns"""
+    columns = (store._buffer, store._starts, store._lengths, store._clicks, store._created)
+    return sum(map(sys.getsizeof, columns))
+
+def test_compact_store_matches_dict_store():
+    """Test the compact store answers exactly like the default one"""
+    store = CompactURLStore()
+    codes = [store.add_url(f'https://example.com/{i}/ünïcode') for i in range(1000)]
+    assert len(set(codes)) == 1000 and len(store) == 1000
+    assert store.get_url(codes[500]) == 'https://example.com/500/ünïcode'
+    store.get_url(codes[500])
+    stats = store.get_stats(codes[500])
+    assert stats['clicks'] == 2
+    assert stats['url'] == 'https://example.com/500/ünïcode'
+    assert stats['created_at'][:4].isdigit()
+    assert store.get_url('nonexistent') is None
+    assert store.get_stats('zzzzzz') is None
+    assert not store.url_exists('ab-cde')
+
+def test_compact_store_ignores_overlong_codes():
+    """Test codes longer than any allocated one are not decoded or cached"""
+    store = CompactURLStore()
+    code = store.add_url('https://example.com/')
+    assert store.get_url('a' * 6000) is None
+    assert not store.url_exists('b' * 7)
+    assert store.allocator.decode('c' * 40) is not None
+    assert set(store.allocator._tiers) == {len(code)}
+    assert store.get_url(code) == 'https://example.com/'
+
+def test_compact_store_uses_a_third_of_the_memory():
+    """Test memory per URL is at least 3x lower in compact mode"""
+    entries = 50000
+    urls = [f'https://example.com/articles/{i}' for i in range(entries)]
+    dict_store = URLStore()
+    for url in urls:
+        dict_store.add_url(url)
+    dict_size = _dict_store_size(dict_store)
+    del dict_store
+    
+    compact_store = CompactURLStore()
+    for url in urls:
+        compact_store.add_url(url)
+    compact_size = _compact_store_size(compact_store)
+    
+    print(f"bytes per URL: dict {dict_size / entries:.0f}, compact {compact_size / entries:.0f}")
+    assert dict_size >= 3 * compact_size
+
+@pytest.mark.parametrize('store_class', [URLStore, CompactURLStore])
+def test_dedup_returns_existing_code(store_class):
+    """Test a URL shortened again keeps its code, matched on its sanitized form"""
+    store = store_class(dedup=True)
+    code = store.add_url('https://example.com/page')
+    assert store.add_url('https://example.com/page') == code
+    assert store.add_url('  example.com/page ') == code
+    assert store.find_url('https://example.com/page') == code
+    assert store.add_url('https://example.com/other') != code
+    assert len(store) == 2
+    
+    plain = store_class()
+    assert plain.add_url('https://example.com/page') != plain.add_url('https://example.com/page')
+    assert plain.find_url('https://example.com/page') is None
+
+def test_dedup_under_concurrency():
+    """Test threads racing to shorten one URL all get the same code"""
+    store = URLStore(dedup=True)
+    codes = set()
+    lock = threading.Lock()
+    
+    def worker():
+        local = {store.add_url(f'https://example.com/{i % 10}') for i in range(1000)}
+        with lock:
+            codes.update(local)
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(codes) == len(store) == 10
+
+def test_dedup_digest_collision_mints_new_code():
+    """Test an index entry pointing at a different URL is not trusted"""
+    store = URLStore(dedup=True)
+    other = store.add_url('https://example.com/other')
+    canonical, key, _, codes = store._url_index._slot('https://example.com/page')
+    codes[key] = other  # What a digest collision would look like
+    code = store.add_url('https://example.com/page')
+    assert code != other
+    assert store.get_url(code) == 'https://example.com/page'
+
+def test_dedup_index_memory():
+    """Test the digest index stays under 100 bytes per URL"""
+    entries = 100000
+    store = URLStore(dedup=True)
+    for i in range(entries):
+        store.add_url(f'https://example.com/articles/{i}')
+    size = sum(sys.getsizeof(codes) + sum(map(sys.getsizeof, codes)) for _, codes in store._url_index._stripes)
+    print(f"dedup index bytes per URL: {size / entries:.0f}")
+    assert size < 100 * entries
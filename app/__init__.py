@@ -1,27 +1,68 @@
-from flask import Flask
-from app.config import Config
-from app.database.connection import init_database
-from app.routes.user_routes import user_bp
-
-def create_app():
-    """Application factory pattern"""
-    app = Flask(__name__)
-    app.config.from_object(Config)
-    
-    # Initialize database
-    if not init_database():
-        raise RuntimeError("Failed to initialize database")
-    
-    # Register blueprints
-    app.register_blueprint(user_bp)
-    
-    # Error handlers
-    @app.errorhandler(404)
-    def not_found(error):
-        return {'status': 'error', 'message': 'Resource not found'}, 404
-
-    @app.errorhandler(500)
-    def internal_error(error):
-        return {'status': 'error', 'message': 'Internal server error'}, 500
-    
+from flask import Flask
+from app.config import Config
+from app.database.connection import init_database, get_pool_stats
+from app.database.writer import get_writer_stats
+from app.models.user import User
+from app.routes.async_user_routes import async_user_bp
+from app.routes.metrics_routes import metrics_bp
+from app.routes.user_routes import user_bp
+from app.utils.auth import AuthBusyError, get_auth_stats
+from app.utils.metrics import configure_metrics, install_request_metrics, register_collector
+from app.utils.rate_limit import get_login_rate_stats
+from app.utils.responses import FastJSONProvider, constant_error_response
+from app.utils.validators import configure_validators
+
+def create_app():
+    """Application factory pattern"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    
+    # Faster JSON serialization (orjson when installed)
+    if Config.FAST_JSON:
+        app.json = FastJSONProvider(app)
+    
+    # Compile validation rules once from the final configuration
+    configure_validators(Config)
+    
+    # Initialize database
+    if not init_database():
+        raise RuntimeError("Failed to initialize database")
+    
+    # Register blueprints (the async variant serves the same routes)
+    if Config.ASYNC_VIEWS:
+        try:
+            import asgiref  # Flask runs async views through asgiref
+        except ImportError:
+            raise RuntimeError("ASYNC_VIEWS requires asgiref: pip install -r requirements.txt")
+        app.register_blueprint(async_user_bp)
+    else:
+        app.register_blueprint(user_bp)
+    
+    # Request timing, component timers and the /metrics endpoint
+    configure_metrics(Config)
+    if Config.METRICS_ENABLED:
+        install_request_metrics(app, Config.SLOW_REQUEST_THRESHOLD_MS)
+        register_collector('db_pool', get_pool_stats)
+        register_collector('db_writer', get_writer_stats)
+        register_collector('user_cache', User.cache_stats)
+        register_collector('bcrypt_pool', get_auth_stats)
+        register_collector('login_rate_limit', get_login_rate_stats)
+        app.register_blueprint(metrics_bp)
+    
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return constant_error_response('Resource not found', 404)
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return constant_error_response('Internal server error', 500)
+    
+    @app.errorhandler(AuthBusyError)
+    def auth_busy(error):
+        # Shed load fast instead of letting logins queue up behind bcrypt
+        response = constant_error_response('Server busy, please retry', 503)
+        response.headers['Retry-After'] = '1'
+        return response
+    
     return app 
\ No newline at end of file
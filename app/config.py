@@ -1,20 +1,80 @@
-import os
-
-class Config:
-    """Application configuration"""
-    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
-    DATABASE_PATH = os.getenv('DATABASE_PATH', 'users.db')
-    DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
-    HOST = os.getenv('HOST', '127.0.0.1')  # Changed from 0.0.0.0 for security
-    PORT = int(os.getenv('PORT', 5000))     # Changed from 5009 to standard 5000
-    
-    # Password requirements
-    MIN_PASSWORD_LENGTH = 8
-    REQUIRE_UPPERCASE = True
-    REQUIRE_LOWERCASE = True
-    REQUIRE_NUMBERS = True
-    REQUIRE_SPECIAL_CHARS = True
-    
-    # Name validation
-    MIN_NAME_LENGTH = 2
-    MAX_NAME_LENGTH = 50 
\ No newline at end of file
+import os
+
+class Config:
+    """Application configuration"""
+    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    DATABASE_PATH = os.getenv('DATABASE_PATH', 'users.db')
+    DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+    HOST = os.getenv('HOST', '127.0.0.1')  # Changed from 0.0.0.0 for security
+    PORT = int(os.getenv('PORT', 5000))     # Changed from 5009 to standard 5000
+    WORKERS = int(os.getenv('WORKERS', os.cpu_count() or 1))  # Processes forked by the production server
+    GRACEFUL_TIMEOUT = float(os.getenv('GRACEFUL_TIMEOUT', 30))  # Seconds workers get to finish on stop/reload
+    ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'  # Serve user routes from async views (needs asgiref)
+    FAST_JSON = os.getenv('FAST_JSON', 'True').lower() == 'true'  # orjson when installed, compact stdlib otherwise
+    
+    # Instrumentation exported at /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    SLOW_REQUEST_THRESHOLD_MS = float(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 0))  # 0 disables the slow log
+    
+    # Database connection pool and SQLite tuning
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5.0))  # Seconds to wait for a free connection
+    DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+    DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')  # NORMAL is durable enough under WAL
+    DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', 16384))
+    DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', 256 * 1024 * 1024))
+    DB_EXECUTOR_THREADS = int(os.getenv('DB_EXECUTOR_THREADS', DB_POOL_SIZE))  # Threads running DB calls for async views
+    DB_SHARDS = max(1, int(os.getenv('DB_SHARDS', 1)))  # >1 splits users across that many SQLite files
+    SEED_SAMPLE_USERS = os.getenv('SEED_SAMPLE_USERS', 'False').lower() == 'true'
+    
+    # Group commit: single-row writes from all threads share transactions
+    WRITE_BATCHING = os.getenv('WRITE_BATCHING', 'True').lower() == 'true'
+    WRITE_BATCH_MAX_OPS = int(os.getenv('WRITE_BATCH_MAX_OPS', 256))  # Writes per transaction at most
+    WRITE_BATCH_MAX_DELAY_MS = float(os.getenv('WRITE_BATCH_MAX_DELAY_MS', 2))  # Wait for more writes after the first
+    WRITE_TIMEOUT = float(os.getenv('WRITE_TIMEOUT', 10.0))  # Seconds a request waits for its batch to commit
+    
+    # Listing endpoints
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 1000))
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))  # Rows fetched per query when streaming
+    SEARCH_RESULT_LIMIT = int(os.getenv('SEARCH_RESULT_LIMIT', 100))
+    
+    # Bulk import
+    BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 50000))
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 1000))  # Rows per insert transaction
+    
+    # In-process cache for user lookups by id (logins always read the database)
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))  # 0 disables the cache
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 30))  # Seconds; 0 means entries never expire
+    
+    # Password hashing (bcrypt runs in a separate process pool)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    # Each forked worker has its own pool, so by default they split the cores (0 hashes on the request thread)
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', max(1, (os.cpu_count() or 1) // (1 if DEBUG else WORKERS))))
+    BCRYPT_MAX_QUEUE = int(os.getenv('BCRYPT_MAX_QUEUE', 32))  # Jobs allowed to wait beyond the workers
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', 10.0))
+    
+    # Signed session tokens issued by /login
+    TOKEN_TTL_SECONDS = int(os.getenv('TOKEN_TTL_SECONDS', 3600))
+    
+    # Login throttling (token buckets per client IP and per email)
+    LOGIN_RATE_LIMIT_ENABLED = os.getenv('LOGIN_RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', 60))
+    LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', 20))
+    LOGIN_EMAIL_PER_MINUTE = float(os.getenv('LOGIN_EMAIL_PER_MINUTE', 6))
+    LOGIN_EMAIL_BURST = int(os.getenv('LOGIN_EMAIL_BURST', 5))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', 100000))  # Buckets kept per limiter
+    
+    # Password requirements
+    MIN_PASSWORD_LENGTH = 8
+    REQUIRE_UPPERCASE = True
+    REQUIRE_LOWERCASE = True
+    REQUIRE_NUMBERS = True
+    REQUIRE_SPECIAL_CHARS = True
+    
+    # Name validation
+    MIN_NAME_LENGTH = 2
+    MAX_NAME_LENGTH = 50
+    
+    # Email validation
+    EMAIL_CHECK_DELIVERABILITY = os.getenv('EMAIL_CHECK_DELIVERABILITY', 'True').lower() == 'true'  # DNS lookup
+    EMAIL_VALIDATION_CACHE_SIZE = int(os.getenv('EMAIL_VALIDATION_CACHE_SIZE', 4096)) 
\ No newline at end of file
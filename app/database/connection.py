@@ -1,52 +1,293 @@
-import sqlite3
-from contextlib import contextmanager
-from app.config import Config
-from app.utils.auth import hash_password
-
-@contextmanager
-def get_db_connection():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(Config.DATABASE_PATH)
-    conn.row_factory = sqlite3.Row  # Enable dict-like access
-    try:
-        yield conn
-    finally:
-        conn.close()
-
-def init_database():
-    """Initialize database connection and create tables if needed"""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT NOT NULL UNIQUE,
-                    password TEXT NOT NULL
-                )
-            ''')
-            
-            # Add sample users with hashed passwords
-            sample_users = [
-                ('John Doe', 'john@example.com', 'SecurePass123!'),
-                ('Jane Smith', 'jane@example.com', 'MySecret456@'),
-                ('Bob Johnson', 'bob@example.com', 'StrongPwd789#')
-            ]
-            
-            for name, email, password in sample_users:
-                hashed_password = hash_password(password)
-                cursor.execute(
-                    "INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
-                    (name, email, hashed_password)
-                )
-            
-            print("Sample users created with hashed passwords:")
-            for name, email, _ in sample_users:
-                print(f"  - {name} ({email})")
-            
-            conn.commit()
-        return True
-    except sqlite3.Error as e:
-        print(f"Database initialization failed: {e}")
-        return False 
\ No newline at end of file
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from app.config import Config
+from app.database.migrations import (
+    DIRECTORY_MIGRATIONS, run_migrations, seed_sample_users, seed_sample_users_sharded
+)
+from app.database.sharding import is_sharded, shard_for_id, shard_path
+from app.utils.metrics import observe
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+class ConnectionPool:
+    """Bounded pool of long-lived SQLite connections"""
+    
+    def __init__(self, database_path, size, timeout):
+        self.database_path = database_path
+        self.size = max(1, size)
+        self.timeout = timeout
+        # LIFO so the most recently used (warmest) connection is handed out first
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._created = 0
+        self._in_use = 0
+        self._acquired = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+    
+    def _connect(self):
+        """Open a connection and apply the performance pragmas"""
+        conn = sqlite3.connect(
+            self.database_path,
+            timeout=Config.DB_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False  # Connections move between request threads
+        )
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {Config.DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{Config.DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {Config.DB_MMAP_SIZE}")
+        conn.execute(f"PRAGMA busy_timeout = {Config.DB_BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+    
+    def _try_acquire(self):
+        """Return an idle connection, a new one if below size, or None"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        
+        try:
+            return self._connect()
+        except sqlite3.Error:
+            with self._lock:
+                self._created -= 1
+            raise
+    
+    def acquire(self):
+        """Borrow a connection, waiting up to `timeout` seconds"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+        
+        conn = self._try_acquire()
+        if conn is None:
+            start = time.perf_counter()
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"No database connection available after {self.timeout}s"
+                )
+            waited = time.perf_counter() - start
+            with self._lock:
+                self._waits += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+        
+        with self._lock:
+            self._in_use += 1
+            self._acquired += 1
+        return conn
+    
+    def release(self, conn):
+        """Return a connection to the pool"""
+        with self._lock:
+            self._in_use -= 1
+        
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # Never hand out a connection mid-transaction
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.put(conn)
+    
+    def _discard(self, conn):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def close(self):
+        """Close every idle connection; borrowed ones close on release"""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+    
+    def stats(self):
+        """Snapshot of pool usage and wait-time statistics"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'open': self._created,
+                'in_use': self._in_use,
+                'idle': self._idle.qsize(),
+                'acquired': self._acquired,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'total_wait_seconds': self._total_wait,
+                'avg_wait_seconds': self._total_wait / self._waits if self._waits else 0.0,
+                'max_wait_seconds': self._max_wait
+            }
+
+_pools = {}  # shard index (None for DATABASE_PATH) -> ConnectionPool
+_pools_config = None
+_pool_lock = threading.Lock()
+
+def database_path(shard=None):
+    """File holding `shard`, or DATABASE_PATH itself for None"""
+    if shard is None:
+        return Config.DATABASE_PATH
+    return shard_path(Config.DATABASE_PATH, shard)
+
+def get_pool(shard=None):
+    """Return the process-wide pool for DATABASE_PATH or one shard, creating it on first use"""
+    global _pools_config
+    config = (Config.DATABASE_PATH, Config.DB_SHARDS)
+    pool = _pools.get(shard)
+    if pool is None or _pools_config != config:
+        with _pool_lock:
+            if _pools_config != config:
+                # Database moved: drop the pools of the old files
+                for old in _pools.values():
+                    old.close()
+                _pools.clear()
+                _pools_config = config
+            pool = _pools.get(shard)
+            if pool is None:
+                pool = _pools[shard] = ConnectionPool(
+                    database_path(shard), Config.DB_POOL_SIZE, Config.DB_POOL_TIMEOUT
+                )
+    return pool
+
+def close_pool():
+    """Close every connection pool (e.g. on shutdown or before forking)"""
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+def get_pool_stats():
+    """Connection pool statistics for monitoring (the DATABASE_PATH pool)"""
+    return get_pool().stats()
+
+@contextmanager
+def get_db_connection(shard=None):
+    """Context manager that borrows a pooled connection to DATABASE_PATH or a shard"""
+    pool = get_pool(shard)
+    start = time.perf_counter()
+    conn = pool.acquire()
+    acquired = time.perf_counter()
+    observe('db_connection_wait_seconds', acquired - start)
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+        observe('db_connection_hold_seconds', time.perf_counter() - acquired)
+
+_db_executor = None
+_db_executor_pid = None
+_db_executor_lock = threading.Lock()
+
+def get_db_executor():
+    """Dedicated thread pool that runs database calls for async views"""
+    global _db_executor, _db_executor_pid
+    # A forked worker must not reuse its parent's threads
+    if _db_executor is None or _db_executor_pid != os.getpid():
+        with _db_executor_lock:
+            if _db_executor is None or _db_executor_pid != os.getpid():
+                _db_executor = ThreadPoolExecutor(
+                    max_workers=Config.DB_EXECUTOR_THREADS, thread_name_prefix='db'
+                )
+                _db_executor_pid = os.getpid()
+    return _db_executor
+
+def shutdown_db_executor():
+    """Stop the database executor threads (they restart on next use)"""
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is not None and _db_executor_pid == os.getpid():
+            _db_executor.shutdown(wait=False)
+        _db_executor = None
+
+async def run_db(func, *args):
+    """Await a blocking database call run on the database executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), partial(func, *args))
+
+_search_index_available = False
+
+def search_index_available():
+    """Whether the FTS5 trigram index over user names can be used"""
+    return _search_index_available
+
+def init_database():
+    """Bring the schema up to date and optionally seed sample users"""
+    global _search_index_available
+    try:
+        if is_sharded():
+            return _init_sharded()
+        
+        with get_db_connection() as conn:
+            run_migrations(conn)
+            
+            if Config.SEED_SAMPLE_USERS:
+                created = seed_sample_users(conn)
+                if created:
+                    print(f"Seeded {created} sample users")
+            
+            _search_index_available = _has_search_index(conn)
+        return True
+    except sqlite3.Error as e:
+        print(f"Database initialization failed: {e}")
+        return False
+
+def _has_search_index(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_fts'"
+    ).fetchone() is not None
+
+def _init_sharded():
+    """Migrate the directory and every shard"""
+    global _search_index_available
+    with get_db_connection() as conn:
+        if conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users'"
+        ).fetchone():
+            print(f"{Config.DATABASE_PATH} holds unsharded users; "
+                  f"convert it with python -m app.database.reshard first")
+            return False
+        run_migrations(conn, DIRECTORY_MIGRATIONS)
+    
+    for shard in range(Config.DB_SHARDS):
+        with get_db_connection(shard) as conn:
+            run_migrations(conn)
+            if shard == 0:
+                _search_index_available = _has_search_index(conn)
+    
+    if Config.SEED_SAMPLE_USERS:
+        with get_db_connection() as conn:
+            created = seed_sample_users_sharded(
+                conn, lambda user_id: get_db_connection(shard_for_id(user_id))
+            )
+        if created:
+            print(f"Seeded {created} sample users")
+    return True
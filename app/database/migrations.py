@@ -0,0 +1,206 @@
+"""
+Versioned schema migrations.
+
+Each migration is applied once, in order, and recorded in the
+schema_version table, so starting the app against an existing database
+only costs a single version lookup. To change the schema, append a new
+step to MIGRATIONS; never edit one that has already shipped. A step that
+raises MigrationSkipped is not recorded and is tried again on the next
+start.
+"""
+
+import sqlite3
+from datetime import datetime
+
+class MigrationSkipped(Exception):
+    """Raised by a step this SQLite build cannot apply; it is retried on the next start"""
+
+def _create_users_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL
+        )
+    ''')
+
+def _create_search_index(cursor):
+    """Create the FTS5 trigram index over users.name and its sync triggers.
+    
+    Builds without FTS5 or the trigram tokenizer skip this step, and
+    searches fall back to LIKE until a build that has them starts.
+    """
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+                name, content='users', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        raise MigrationSkipped(f"full-text search unavailable, falling back to LIKE: {e}") from e
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts (rowid, name) VALUES (new.id, new.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts (users_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_fts_update AFTER UPDATE OF name ON users BEGIN
+            INSERT INTO users_fts (users_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO users_fts (rowid, name) VALUES (new.id, new.name);
+        END
+    ''')
+    # Index rows that were inserted before the index existed
+    cursor.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+
+def _create_users_version(cursor):
+    """Single-row change counter bumped by triggers on every users write.
+    
+    Lets conditional GETs (ETag / Last-Modified) be answered from one
+    primary-key read instead of querying and serializing the rows.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute(
+        "INSERT OR IGNORE INTO users_version (id, version, updated_at) "
+        "VALUES (1, 0, CAST(strftime('%s', 'now') AS INTEGER))"
+    )
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS users_version_{event.lower()} AFTER {event} ON users BEGIN
+                UPDATE users_version
+                SET version = version + 1, updated_at = CAST(strftime('%s', 'now') AS INTEGER)
+                WHERE id = 1;
+            END
+        ''')
+
+# (version, description, step) in the order they must be applied
+MIGRATIONS = [
+    (1, 'create users table', _create_users_table),
+    (2, 'full-text search index on users.name', _create_search_index),
+    (3, 'users change counter', _create_users_version),
+]
+
+def _create_user_directory(cursor):
+    """Email -> id map kept in DATABASE_PATH when users are sharded.
+    
+    Inserting here allocates the id of a new user and enforces unique
+    emails across all shards.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_directory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL UNIQUE
+        )
+    ''')
+
+# Schema of the directory database; each shard gets MIGRATIONS
+DIRECTORY_MIGRATIONS = [
+    (1, 'create user directory', _create_user_directory),
+]
+
+# Sample users with bcrypt hashes computed ahead of time, so seeding a
+# database never runs bcrypt at boot. Passwords: SecurePass123!,
+# MySecret456@ and StrongPwd789#.
+SAMPLE_USERS = [
+    ('John Doe', 'john@example.com', b'$2b$12$UoH6OOJkqsjmbsucvLdA7.X81xejsm5dben8AFsyJxJuS0DOVu7aC'),
+    ('Jane Smith', 'jane@example.com', b'$2b$12$WC1FdCPXqyQGBfiJYHmacO49uSYqInjByKSm3L.OY2kyYthMHwtEK'),
+    ('Bob Johnson', 'bob@example.com', b'$2b$12$MY4Xcci61RIXRb2psacnP.2YDq3FK3kWw56TotuWrrAsEMv7DXQaK')
+]
+
+def _create_version_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+
+def get_schema_version(conn):
+    """Highest applied migration version (0 for a new database)"""
+    _create_version_table(conn)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def get_applied_versions(conn):
+    """Set of applied migration versions; a skipped step leaves a gap"""
+    _create_version_table(conn)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """Apply pending migrations; returns the list of versions applied.
+    
+    Each step runs in its own IMMEDIATE transaction and the version is
+    re-read once the write lock is held, so workers booting at the same
+    time cannot apply a step twice.
+    """
+    applied = []
+    done = get_applied_versions(conn)
+    pending = [migration for migration in migrations if migration[0] not in done]
+    if not pending:
+        return applied  # Fast path: nothing to do
+    
+    for version, description, step in pending:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version in get_applied_versions(conn):
+                conn.rollback()
+                continue
+            step(conn.cursor())
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (version, description, datetime.utcnow().isoformat())
+            )
+            conn.commit()
+        except MigrationSkipped as e:
+            conn.rollback()
+            print(f"Skipped migration {version} ({description}) until the next start: {e}")
+            continue
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"Applied migration {version}: {description}")
+    return applied
+
+def seed_sample_users(conn):
+    """Insert the sample users if missing; safe to run on every start"""
+    cursor = conn.executemany(
+        "INSERT OR IGNORE INTO users (name, email, password) VALUES (?, ?, ?)",
+        SAMPLE_USERS
+    )
+    conn.commit()
+    return cursor.rowcount
+
+def seed_sample_users_sharded(directory_conn, shard_connection):
+    """Sharded counterpart of seed_sample_users.
+    
+    `shard_connection(user_id)` is a context manager yielding a connection
+    to the shard that owns the user.
+    """
+    created = 0
+    for name, email, password in SAMPLE_USERS:
+        directory_conn.execute("INSERT OR IGNORE INTO user_directory (email) VALUES (?)", (email,))
+        directory_conn.commit()
+        user_id = directory_conn.execute(
+            "SELECT id FROM user_directory WHERE email = ?", (email,)
+        ).fetchone()[0]
+        with shard_connection(user_id) as shard_conn:
+            cursor = shard_conn.execute(
+                "INSERT OR IGNORE INTO users (id, name, email, password) VALUES (?, ?, ?, ?)",
+                (user_id, name, email, password)
+            )
+            shard_conn.commit()
+            created += cursor.rowcount
+    return created
@@ -0,0 +1,118 @@
+"""
+Copy users into a database with a different shard count.
+
+    python -m app.database.reshard --source users.db --target sharded/users.db --shards 4
+
+Reads every user (id and password hash included) from --source, which is
+unsharded unless --source-shards says otherwise, and writes them to a new
+database laid out for --shards: a plain users table in --target for one
+shard, or a directory in --target plus one file per shard next to it. The
+directory is rebuilt from the shard rows, which also drops any email
+reservations left behind by failed writes.
+
+The source is only read. Stop the app (or work from a backup) so no writes
+are missed, then point DATABASE_PATH and DB_SHARDS at the target. A failed
+run leaves a partial target; delete it before retrying.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from collections import defaultdict
+from app.database.migrations import DIRECTORY_MIGRATIONS, MIGRATIONS, run_migrations
+from app.database.sharding import shard_for_id, shard_path
+
+BATCH_SIZE = 5000
+
+def _paths(base_path, shards):
+    """Files holding the users of a database with `shards` shards"""
+    if shards == 1:
+        return [base_path]
+    return [shard_path(base_path, index) for index in range(shards)]
+
+def _read_users(source, shards):
+    """Yield batches of (id, name, email, password) rows from every source file"""
+    for path in _paths(source, shards):
+        conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+        try:
+            cursor = conn.execute("SELECT id, name, email, password FROM users ORDER BY id")
+            while True:
+                rows = cursor.fetchmany(BATCH_SIZE)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+def _open_target(path, migrations):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    run_migrations(conn, migrations)
+    return conn
+
+def reshard(source, target, shards, source_shards=1):
+    """Copy every user from `source` into a new `target` with `shards` shards; returns the count"""
+    if shards < 1 or source_shards < 1:
+        raise ValueError("Shard counts must be at least 1")
+    missing = [path for path in _paths(source, source_shards) if not os.path.exists(path)]
+    if missing:
+        raise ValueError(f"Source not found: {', '.join(missing)}")
+    targets = [target] + (_paths(target, shards) if shards > 1 else [])
+    existing = [path for path in targets if os.path.exists(path)]
+    if existing:
+        raise ValueError(f"Target already exists: {', '.join(existing)}")
+    
+    if shards == 1:
+        directory = None
+        shard_conns = [_open_target(target, MIGRATIONS)]
+    else:
+        directory = _open_target(target, DIRECTORY_MIGRATIONS)
+        shard_conns = [_open_target(path, MIGRATIONS) for path in _paths(target, shards)]
+    
+    copied = 0
+    try:
+        for rows in _read_users(source, source_shards):
+            if directory is not None:
+                # Explicit ids also advance the AUTOINCREMENT sequence past them
+                with directory:
+                    directory.executemany(
+                        "INSERT INTO user_directory (id, email) VALUES (?, ?)",
+                        [(user_id, email) for user_id, _, email, _ in rows]
+                    )
+            by_shard = defaultdict(list)
+            for row in rows:
+                by_shard[shard_for_id(row[0], shards)].append(row)
+            for shard, shard_rows in by_shard.items():
+                with shard_conns[shard]:
+                    shard_conns[shard].executemany(
+                        "INSERT INTO users (id, name, email, password) VALUES (?, ?, ?, ?)", shard_rows
+                    )
+            copied += len(rows)
+        
+        written = sum(conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] for conn in shard_conns)
+        if written != copied:
+            raise RuntimeError(f"Read {copied} users but the target holds {written}")
+    finally:
+        for conn in shard_conns + ([directory] if directory is not None else []):
+            conn.close()
+    return copied
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', required=True, help='DATABASE_PATH of the existing database')
+    parser.add_argument('--source-shards', type=int, default=1, help='DB_SHARDS of the existing database')
+    parser.add_argument('--target', required=True, help='DATABASE_PATH of the new database')
+    parser.add_argument('--shards', type=int, required=True, help='DB_SHARDS of the new database')
+    args = parser.parse_args()
+    
+    try:
+        copied = reshard(args.source, args.target, args.shards, args.source_shards)
+    except (ValueError, RuntimeError, sqlite3.Error) as e:
+        print(f"Reshard failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Copied {copied} users into {args.shards} shard(s) at {args.target}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
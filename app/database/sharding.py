@@ -0,0 +1,74 @@
+"""
+Routing for users partitioned across several SQLite files.
+
+With DB_SHARDS > 1, user rows live in DB_SHARDS shard files next to
+DATABASE_PATH (users.shard0.db, users.shard1.db, ...), each with the full
+users schema. A user's shard is derived from its id. DATABASE_PATH itself
+becomes the directory: it allocates ids and maps every email to its id,
+which enforces unique emails across shards and lets get_by_email find the
+shard. Shards hold the user data; the directory can be rebuilt from them
+with `python -m app.database.reshard`.
+
+With DB_SHARDS = 1 (the default) nothing here is used and DATABASE_PATH
+holds the users table as before.
+"""
+
+import heapq
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from app.config import Config
+
+def is_sharded():
+    return Config.DB_SHARDS > 1
+
+def shard_for_id(user_id, shards=None):
+    """Shard index for a user id.
+    
+    Ids are allocated sequentially, so id modulo the shard count spreads
+    users (and their writes) evenly and stays computable without a lookup.
+    """
+    return int(user_id) % (Config.DB_SHARDS if shards is None else shards)
+
+def shard_path(base_path, index):
+    """Path of shard `index` for the database at `base_path`"""
+    root, ext = os.path.splitext(base_path)
+    return f"{root}.shard{index}{ext or '.db'}"
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor, _executor_pid
+    # Threads do not survive fork(); a worker starts its own pool
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(
+                    max_workers=min(32, Config.DB_SHARDS * 4), thread_name_prefix='shard'
+                )
+                _executor_pid = os.getpid()
+    return _executor
+
+def shutdown_shard_executor():
+    """Stop the fan-out threads (they restart on next use)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False)
+        _executor = None
+
+def fan_out(func, *args):
+    """Run `func(shard, *args)` on every shard in parallel; results in shard order.
+    
+    The first exception raised by any shard propagates.
+    """
+    futures = [_get_executor().submit(func, shard, *args) for shard in range(Config.DB_SHARDS)]
+    return [future.result() for future in futures]
+
+def merge_sorted(results, key, limit=None):
+    """Merge per-shard lists that are each sorted by `key`, keeping the first `limit`"""
+    merged = heapq.merge(*results, key=key)
+    return list(merged if limit is None else islice(merged, limit))
@@ -0,0 +1,220 @@
+"""
+Group-commit writer.
+
+Single-row writes from every request thread are queued to one writer
+thread per database file, which applies whatever has accumulated (up to WRITE_BATCH_MAX_OPS,
+waiting at most WRITE_BATCH_MAX_DELAY_MS after the first write) in a single
+transaction. SQLite then syncs once per batch instead of once per row, and
+request threads never contend for the write lock.
+
+Each write runs inside its own SAVEPOINT, so a failing write (say a
+duplicate email) is rolled back alone and reported through its future
+while the rest of the batch commits.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from app.config import Config
+from app.database.connection import get_db_connection
+from app.utils.metrics import observe
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+class WriteTimeoutError(sqlite3.OperationalError):
+    """Raised when a queued write is not committed in time"""
+
+class GroupCommitWriter:
+    """Writer thread that commits queued writes in batches"""
+    
+    def __init__(self, max_ops, max_delay, shard=None):
+        self.max_ops = max(1, max_ops)
+        self.max_delay = max_delay
+        self.shard = shard
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stopping = False
+        self._batches = 0
+        self._committed = 0
+        self._failed = 0
+        self._max_batch = 0
+        name = 'db-writer' if shard is None else f'db-writer-{shard}'
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def submit(self, func, *args):
+        """Queue `func(conn, *args)` for the next batch; returns a Future of its result.
+        
+        Cancelling the future before its batch starts keeps it from running.
+        """
+        future = Future()
+        # Under the lock, so nothing is queued behind shutdown()'s stop sentinel
+        with self._lock:
+            if self._stopping:
+                raise sqlite3.OperationalError("Writer is shut down")
+            self._queue.put((func, args, future, time.perf_counter()))
+        return future
+    
+    def _collect(self):
+        """Block for one write, then gather more until the batch is full or the delay is up"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_delay
+        while len(batch) < self.max_ops:
+            try:
+                remaining = deadline - time.perf_counter()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return [item for item in batch if item is not None]  # None is the stop sentinel
+    
+    def _apply(self, conn, batch):
+        """Run every write of a batch in one transaction; returns (future, result, error) triples"""
+        outcomes = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for func, args, future, _ in batch:
+                conn.execute("SAVEPOINT write")
+                try:
+                    result = func(conn, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write")
+                    conn.execute("RELEASE write")
+                    outcomes.append((future, None, e))
+                    continue
+                conn.execute("RELEASE write")
+                outcomes.append((future, result, None))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return outcomes
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+            if self._stopping and self._queue.empty():
+                return
+    
+    def _write(self, batch):
+        # Writes whose caller gave up are dropped; the rest can no longer be cancelled
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        start = time.perf_counter()
+        try:
+            with get_db_connection(self.shard) as conn:
+                outcomes = self._apply(conn, batch)
+        except Exception as e:
+            # BEGIN or COMMIT failed, so nothing in the batch was written
+            outcomes = [(future, None, e) for _, _, future, _ in batch]
+        
+        committed = time.perf_counter()
+        failed = 0
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                failed += 1
+                future.set_exception(error)
+        
+        with self._lock:
+            self._batches += 1
+            self._committed += len(batch) - failed
+            self._failed += failed
+            self._max_batch = max(self._max_batch, len(batch))
+        observe('db_write_batch_size', len(batch), buckets=BATCH_SIZE_BUCKETS)
+        observe('db_write_commit_seconds', committed - start)
+        for _, _, _, submitted in batch:
+            observe('db_write_latency_seconds', committed - submitted)
+    
+    def shutdown(self, timeout=None):
+        """Commit what is queued, then stop the writer thread"""
+        with self._lock:
+            self._stopping = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+    
+    def stats(self):
+        """Batch and throughput counters for monitoring"""
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'batches': self._batches,
+                'committed': self._committed,
+                'failed': self._failed,
+                'avg_batch_size': (self._committed + self._failed) / self._batches if self._batches else 0.0,
+                'max_batch_size': self._max_batch
+            }
+
+_writers = {}  # shard index (None for DATABASE_PATH) -> GroupCommitWriter
+_writers_pid = None
+_writer_lock = threading.Lock()
+
+def get_writer(shard=None):
+    """Return the process-wide writer for DATABASE_PATH or a shard, starting its thread on first use"""
+    global _writers_pid
+    # Threads do not survive fork(); a worker starts its own writers
+    writer = _writers.get(shard) if _writers_pid == os.getpid() else None
+    if writer is None:
+        with _writer_lock:
+            if _writers_pid != os.getpid():
+                _writers.clear()
+                _writers_pid = os.getpid()
+            writer = _writers.get(shard)
+            if writer is None:
+                writer = _writers[shard] = GroupCommitWriter(
+                    Config.WRITE_BATCH_MAX_OPS, Config.WRITE_BATCH_MAX_DELAY_MS / 1000, shard
+                )
+    return writer
+
+def shutdown_writer():
+    """Flush and stop every writer (they restart on next use)"""
+    with _writer_lock:
+        if _writers_pid == os.getpid():
+            for writer in _writers.values():
+                writer.shutdown(Config.WRITE_TIMEOUT)
+        _writers.clear()
+
+def get_writer_stats():
+    """Group-commit statistics summed over all writers (zeros before the first write)"""
+    with _writer_lock:
+        writers = list(_writers.values()) if _writers_pid == os.getpid() else []
+    totals = {'queued': 0, 'batches': 0, 'committed': 0, 'failed': 0, 'max_batch_size': 0}
+    for writer in writers:
+        stats = writer.stats()
+        for key in ('queued', 'batches', 'committed', 'failed'):
+            totals[key] += stats[key]
+        totals['max_batch_size'] = max(totals['max_batch_size'], stats['max_batch_size'])
+    writes = totals['committed'] + totals['failed']
+    totals['avg_batch_size'] = writes / totals['batches'] if totals['batches'] else 0.0
+    return totals
+
+def run_write(func, *args, shard=None):
+    """Run `func(conn, *args)` in a write transaction and return its result.
+    
+    `shard` selects the shard database (None is DATABASE_PATH). With
+    WRITE_BATCHING on, the write is committed by that database's
+    group-commit writer together with concurrent ones; otherwise it gets
+    its own transaction on a pooled connection. Errors raised by `func`
+    propagate. A batched write still queued after WRITE_TIMEOUT is
+    cancelled, so WriteTimeoutError means it was not applied; one whose
+    batch has already started waits for that batch's outcome.
+    """
+    if not Config.WRITE_BATCHING:
+        with get_db_connection(shard) as conn:
+            with conn:
+                return func(conn, *args)
+    
+    future = get_writer(shard).submit(func, *args)
+    try:
+        return future.result(timeout=Config.WRITE_TIMEOUT)
+    except FutureTimeoutError:
+        if future.cancel():
+            raise WriteTimeoutError("Write was not committed in time")
+        # Its batch is already being committed; report what actually happened
+        return future.result()
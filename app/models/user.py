@@ -1,110 +1,563 @@
-from app.database.connection import get_db_connection
-import sqlite3
-
-class User:
-    """User model for database operations"""
-    
-    @staticmethod
-    def get_all():
-        """Get all users (excluding passwords)"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, email FROM users")
-                users = cursor.fetchall()
-                return [dict(user) for user in users]
-        except sqlite3.Error:
-            return None
-    
-    @staticmethod
-    def get_by_id(user_id):
-        """Get user by ID (excluding password)"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, email FROM users WHERE id = ?", (user_id,))
-                user = cursor.fetchone()
-                return dict(user) if user else None
-        except sqlite3.Error:
-            return None
-    
-    @staticmethod
-    def get_by_email(email):
-        """Get user by email (including password for login)"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-                user = cursor.fetchone()
-                return dict(user) if user else None
-        except sqlite3.Error:
-            return None
-    
-    @staticmethod
-    def create(name, email, hashed_password):
-        """Create a new user"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
-                    (name, email, hashed_password)
-                )
-                conn.commit()
-                return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            return None  # Email already exists
-        except sqlite3.Error:
-            return None
-    
-    @staticmethod
-    def update(user_id, name, email):
-        """Update user information"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "UPDATE users SET name = ?, email = ? WHERE id = ?",
-                    (name, email, user_id)
-                )
-                conn.commit()
-                return cursor.rowcount > 0
-        except sqlite3.IntegrityError:
-            return None  # Email already exists
-        except sqlite3.Error:
-            return False
-    
-    @staticmethod
-    def delete(user_id):
-        """Delete a user"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-                conn.commit()
-                return cursor.rowcount > 0
-        except sqlite3.Error:
-            return False
-    
-    @staticmethod
-    def search_by_name(name):
-        """Search users by name"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id, name, email FROM users WHERE name LIKE ?", (f'%{name}%',))
-                users = cursor.fetchall()
-                return [dict(user) for user in users]
-        except sqlite3.Error:
-            return None
-    
-    @staticmethod
-    def exists(user_id):
-        """Check if user exists"""
-        try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT id FROM users WHERE id = ?", (user_id,))
-                return cursor.fetchone() is not None
-        except sqlite3.Error:
-            return False 
\ No newline at end of file
+from collections import OrderedDict, defaultdict
+from enum import Enum
+from operator import itemgetter
+from app.config import Config
+from app.database.connection import get_db_connection, search_index_available
+from app.database.sharding import fan_out, is_sharded, merge_sorted, shard_for_id
+from app.database.writer import run_write
+import sqlite3
+import threading
+import time
+
+class UserCache:
+    """Thread-safe LRU of user rows keyed by lookup, with optional TTL.
+    
+    Every entry is indexed by the id of the user it holds, so a write can
+    drop all cached views of that user in O(1).
+    """
+    
+    def __init__(self, maxsize, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (user dict, expires_at)
+        self._keys_by_id = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key):
+        """Return a copy of the cached user for `key`, or None"""
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] and entry[1] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[0])
+    
+    def put(self, key, user):
+        """Cache `user` under `key`, evicting the least recently used entries"""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (dict(user), expires_at)
+            self._keys_by_id.setdefault(user['id'], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def _remove(self, key):
+        user, _ = self._entries.pop(key)
+        keys = self._keys_by_id.get(user['id'])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_id[user['id']]
+    
+    def invalidate(self, key):
+        """Drop a single key"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+    
+    def invalidate_user(self, user_id):
+        """Drop every cached entry that holds the given user"""
+        with self._lock:
+            for key in list(self._keys_by_id.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+    
+    def stats(self):
+        """Hit/miss/eviction counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+_cache = UserCache(Config.USER_CACHE_SIZE, Config.USER_CACHE_TTL)
+
+# Single-row writes, run by run_write() inside a (possibly shared) transaction
+
+def _insert_user(conn, name, email, hashed_password):
+    return conn.execute(
+        "INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+        (name, email, hashed_password)
+    ).lastrowid
+
+def _update_user(conn, user_id, name, email):
+    return conn.execute(
+        "UPDATE users SET name = ?, email = ? WHERE id = ?", (name, email, user_id)
+    ).rowcount
+
+def _delete_user(conn, user_id):
+    return conn.execute("DELETE FROM users WHERE id = ?", (user_id,)).rowcount
+
+# With sharding on, the directory in DATABASE_PATH allocates ids and maps
+# emails to them, and each row is inserted into its shard with that id
+
+def _reserve_email(conn, email):
+    return conn.execute("INSERT INTO user_directory (email) VALUES (?)", (email,)).lastrowid
+
+def _move_email(conn, user_id, old_email, email):
+    return conn.execute(
+        "UPDATE user_directory SET email = ? WHERE id = ? AND email = ?", (email, user_id, old_email)
+    ).rowcount
+
+def _update_user_if_email(conn, user_id, old_email, name, email):
+    return conn.execute(
+        "UPDATE users SET name = ?, email = ? WHERE id = ? AND email = ?", (name, email, user_id, old_email)
+    ).rowcount
+
+def _release_email(conn, user_id):
+    conn.execute("DELETE FROM user_directory WHERE id = ?", (user_id,))
+
+def _insert_user_with_id(conn, user_id, name, email, hashed_password):
+    conn.execute(
+        "INSERT INTO users (id, name, email, password) VALUES (?, ?, ?, ?)",
+        (user_id, name, email, hashed_password)
+    )
+    return user_id
+
+def _shard_of(user_id):
+    """Shard holding the user, or None when users are not sharded"""
+    return shard_for_id(user_id) if is_sharded() else None
+
+class WriteResult(Enum):
+    """Outcome of a single-statement write"""
+    OK = 'ok'
+    NOT_FOUND = 'not_found'
+    CONFLICT = 'conflict'  # UNIQUE(email) violated
+    ERROR = 'error'
+
+class User:
+    """User model for database operations"""
+    
+    # Columns that listings may return, in output order; id always comes first
+    PUBLIC_FIELDS = ('id', 'name', 'email')
+    
+    @staticmethod
+    def _select_list(fields, prefix=''):
+        """SQL column list for `fields`; only whitelisted names reach the query"""
+        unknown = set(fields) - set(User.PUBLIC_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+        return ', '.join(prefix + field for field in fields)
+    
+    @staticmethod
+    def _fetch(cursor, as_rows):
+        """Rows as dicts, or as plain tuples (in column order) when `as_rows`"""
+        if as_rows:
+            cursor.row_factory = None
+            return cursor.fetchall()
+        return [dict(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _page_query(after_id=None, limit=None, fields=PUBLIC_FIELDS):
+        """Build a keyset-paginated query over users ordered by id"""
+        query = f"SELECT {User._select_list(fields)} FROM users"
+        params = []
+        if after_id is not None:
+            query += " WHERE id > ?"
+            params.append(after_id)
+        query += " ORDER BY id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+    
+    @staticmethod
+    def _query_page(after_id, limit, fields, as_rows):
+        """One keyset page, merged across shards when sharded; errors propagate"""
+        def page(shard):
+            with get_db_connection(shard) as conn:
+                cursor = conn.cursor()
+                cursor.execute(*User._page_query(after_id, limit, fields))
+                return User._fetch(cursor, as_rows)
+        
+        if not is_sharded():
+            return page(None)
+        # Each shard returns its first `limit` rows past the cursor, so the
+        # first `limit` of their merge is the page
+        key = itemgetter(0) if as_rows else itemgetter('id')
+        return merge_sorted(fan_out(page), key, limit)
+    
+    @staticmethod
+    def get_all(after_id=None, limit=None, fields=PUBLIC_FIELDS, as_rows=False):
+        """Get users (excluding passwords), optionally one keyset page.
+        
+        Only `fields` (a subset of PUBLIC_FIELDS, starting with id) are
+        selected; `as_rows` returns tuples instead of dicts.
+        """
+        try:
+            return User._query_page(after_id, limit, fields, as_rows)
+        except sqlite3.Error:
+            return None
+    
+    @staticmethod
+    def iter_all(after_id=None, limit=None, batch_size=500, fields=PUBLIC_FIELDS, as_rows=False):
+        """Yield users page by page so memory stays constant.
+        
+        The pooled connection is released between pages, so a slow client
+        never pins a connection. Database errors propagate to the caller.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = batch_size if remaining is None else min(batch_size, remaining)
+            rows = User._query_page(after_id, page_size, fields, as_rows)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1][0] if as_rows else rows[-1]['id']
+            if remaining is not None:
+                remaining -= len(rows)
+    
+    @staticmethod
+    def get_by_id(user_id):
+        """Get user by ID (excluding password)"""
+        key = ('id', int(user_id))
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            with get_db_connection(_shard_of(user_id)) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, name, email FROM users WHERE id = ?", (user_id,))
+                user = cursor.fetchone()
+                if user is None:
+                    return None
+                user = dict(user)
+                _cache.put(key, user)
+                return user
+        except sqlite3.Error:
+            return None
+    
+    @staticmethod
+    def get_by_email(email):
+        """Get user by email (including password for login).
+        
+        Never cached: the cache is per process, so another worker could
+        keep accepting a deleted user or an old email until its entry expired.
+        """
+        try:
+            shard = None
+            if is_sharded():
+                # The directory says which shard holds the email
+                with get_db_connection() as conn:
+                    row = conn.execute(
+                        "SELECT id FROM user_directory WHERE email = ?", (email,)
+                    ).fetchone()
+                if row is None:
+                    return None
+                shard = shard_for_id(row['id'])
+            with get_db_connection(shard) as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
+                user = cursor.fetchone()
+                if user is None:
+                    return None
+                return dict(user)
+        except sqlite3.Error:
+            return None
+    
+    @staticmethod
+    def create(name, email, hashed_password):
+        """Create a new user in one statement.
+        
+        Returns (WriteResult, user_id); the UNIQUE constraint on email
+        reports conflicts, so no lookup is needed first.
+        """
+        try:
+            if not is_sharded():
+                return WriteResult.OK, run_write(_insert_user, name, email, hashed_password)
+            # Reserving the email allocates the id and rejects emails used on any shard
+            user_id = run_write(_reserve_email, email)
+            try:
+                run_write(_insert_user_with_id, user_id, name, email, hashed_password,
+                          shard=shard_for_id(user_id))
+            except sqlite3.Error:
+                run_write(_release_email, user_id)
+                raise
+            return WriteResult.OK, user_id
+        except sqlite3.IntegrityError:
+            return WriteResult.CONFLICT, None  # Email already exists
+        except sqlite3.Error:
+            return WriteResult.ERROR, None
+    
+    @staticmethod
+    def get_existing_emails(emails, chunk_size=500):
+        """Return which of the given emails are already registered"""
+        emails = list(emails)
+        existing = set()
+        table = 'user_directory' if is_sharded() else 'users'
+        try:
+            with get_db_connection() as conn:
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(emails), chunk_size):
+                    chunk = emails[start:start + chunk_size]
+                    placeholders = ', '.join('?' * len(chunk))
+                    cursor = conn.execute(
+                        f"SELECT email FROM {table} WHERE email IN ({placeholders})", chunk
+                    )
+                    existing.update(row['email'] for row in cursor)
+            return existing
+        except sqlite3.Error:
+            return None
+    
+    @staticmethod
+    def bulk_create(users, chunk_size=1000):
+        """Create many users, one transaction per chunk.
+        
+        `users` is a list of (name, email, hashed_password) tuples. Returns a
+        list with one WriteResult per user.
+        """
+        if is_sharded():
+            return User._bulk_create_sharded(users, chunk_size)
+        insert = "INSERT INTO users (name, email, password) VALUES (?, ?, ?)"
+        results = []
+        try:
+            with get_db_connection() as conn:
+                for start in range(0, len(users), chunk_size):
+                    chunk = users[start:start + chunk_size]
+                    try:
+                        with conn:
+                            conn.executemany(insert, chunk)
+                        results.extend([WriteResult.OK] * len(chunk))
+                        continue
+                    except sqlite3.IntegrityError:
+                        pass  # Lost a race on an email; retry this chunk row by row
+                    except sqlite3.Error:
+                        results.extend([WriteResult.ERROR] * len(chunk))
+                        continue
+                    
+                    for user in chunk:
+                        try:
+                            with conn:
+                                conn.execute(insert, user)
+                            results.append(WriteResult.OK)
+                        except sqlite3.IntegrityError:
+                            results.append(WriteResult.CONFLICT)
+                        except sqlite3.Error:
+                            results.append(WriteResult.ERROR)
+        except sqlite3.Error:
+            pass  # Could not get a connection
+        # Anything not attempted counts as a database error
+        results.extend([WriteResult.ERROR] * (len(users) - len(results)))
+        return results
+    
+    @staticmethod
+    def _bulk_create_sharded(users, chunk_size):
+        """bulk_create with ids reserved in the directory, then rows inserted per shard"""
+        insert = "INSERT INTO users (id, name, email, password) VALUES (?, ?, ?, ?)"
+        results = []
+        for start in range(0, len(users), chunk_size):
+            chunk = users[start:start + chunk_size]
+            emails = [email for _, email, _ in chunk]
+            try:
+                with get_db_connection() as conn:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO user_directory (email) VALUES (?)", [(email,) for email in emails]
+                        )
+                        placeholders = ', '.join('?' * len(emails))
+                        ids = {
+                            row['email']: row['id'] for row in conn.execute(
+                                f"SELECT id, email FROM user_directory WHERE email IN ({placeholders})", emails
+                            )
+                        }
+            except sqlite3.IntegrityError:
+                # Lost a race on an email; create this chunk row by row
+                results.extend(User.create(*user)[0] for user in chunk)
+                continue
+            except sqlite3.Error:
+                results.extend([WriteResult.ERROR] * len(chunk))
+                continue
+            
+            by_shard = defaultdict(list)
+            for name, email, hashed_password in chunk:
+                by_shard[shard_for_id(ids[email])].append((ids[email], name, email, hashed_password))
+            failed = set()
+            for shard, rows in by_shard.items():
+                try:
+                    with get_db_connection(shard) as conn:
+                        with conn:
+                            conn.executemany(insert, rows)
+                except sqlite3.Error:
+                    failed.update(row[0] for row in rows)
+            
+            if failed:
+                try:
+                    with get_db_connection() as conn:
+                        with conn:
+                            conn.executemany(
+                                "DELETE FROM user_directory WHERE id = ?", [(user_id,) for user_id in failed]
+                            )
+                except sqlite3.Error:
+                    pass  # The emails stay reserved until the next reshard rebuilds the directory
+            results.extend(
+                WriteResult.ERROR if ids[email] in failed else WriteResult.OK for email in emails
+            )
+        return results
+    
+    @staticmethod
+    def _update_sharded(user_id, name, email, attempts=5):
+        """Update a sharded user, moving its email in the directory first if it changed.
+        
+        Both writes only apply if the email is still the one read, so of
+        two concurrent updates one wins and the other re-reads and retries
+        instead of leaving the directory and the shard disagreeing.
+        """
+        shard = shard_for_id(user_id)
+        for _ in range(attempts):
+            with get_db_connection(shard) as conn:
+                row = conn.execute("SELECT email FROM users WHERE id = ?", (user_id,)).fetchone()
+            if row is None:
+                return 0
+            old_email = row['email']
+            # Raises IntegrityError if taken
+            if email != old_email and not run_write(_move_email, user_id, old_email, email):
+                continue
+            try:
+                if run_write(_update_user_if_email, user_id, old_email, name, email, shard=shard):
+                    return 1
+            except sqlite3.Error:
+                if email != old_email:
+                    run_write(_move_email, user_id, email, old_email)
+                raise
+            if email != old_email:
+                run_write(_move_email, user_id, email, old_email)
+        raise sqlite3.IntegrityError('user changed concurrently')
+    
+    @staticmethod
+    def update(user_id, name, email):
+        """Update user information in one statement.
+        
+        rowcount tells a missing user apart from a successful update, and
+        the UNIQUE constraint reports an email taken by another user.
+        """
+        try:
+            if is_sharded():
+                updated = User._update_sharded(user_id, name, email)
+            else:
+                updated = run_write(_update_user, user_id, name, email)
+            if updated == 0:
+                return WriteResult.NOT_FOUND
+            _cache.invalidate_user(int(user_id))
+            return WriteResult.OK
+        except sqlite3.IntegrityError:
+            return WriteResult.CONFLICT  # Email already exists
+        except sqlite3.Error:
+            return WriteResult.ERROR
+    
+    @staticmethod
+    def delete(user_id):
+        """Delete a user in one statement"""
+        try:
+            deleted = run_write(_delete_user, user_id, shard=_shard_of(user_id))
+            if deleted and is_sharded():
+                run_write(_release_email, user_id)
+            _cache.invalidate_user(int(user_id))
+            return WriteResult.OK if deleted else WriteResult.NOT_FOUND
+        except sqlite3.Error:
+            return WriteResult.ERROR
+    
+    @staticmethod
+    def _search_query(name, limit, fields, with_sort_key=False):
+        """Search query and parameters; `with_sort_key` prepends the column results are ordered by"""
+        # The trigram index needs at least three characters to match on
+        if search_index_available() and len(name) >= 3:
+            sort_key = 'matches.rank, ' if with_sort_key else ''
+            query = f'''
+                SELECT {sort_key}{User._select_list(fields, 'u.')}
+                FROM (
+                    SELECT rowid, rank FROM users_fts
+                    WHERE users_fts MATCH ? ORDER BY rank LIMIT ?
+                ) AS matches
+                JOIN users u ON u.id = matches.rowid
+                ORDER BY matches.rank
+            '''
+            # Quote the term so it is matched as a literal substring
+            return query, ('"' + name.replace('"', '""') + '"', limit)
+        sort_key = 'id, ' if with_sort_key else ''
+        query = f"SELECT {sort_key}{User._select_list(fields)} FROM users WHERE name LIKE ? ORDER BY id LIMIT ?"
+        return query, (f'%{name}%', limit)
+    
+    @staticmethod
+    def search_by_name(name, limit=100, fields=PUBLIC_FIELDS, as_rows=False):
+        """Search users by name, best matches first.
+        
+        Sharded searches take the best `limit` matches of every shard and
+        merge them; FTS ranks come from per-shard statistics, which agree
+        closely once shards hold more than a handful of users.
+        """
+        try:
+            if not is_sharded():
+                with get_db_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(*User._search_query(name, limit, fields))
+                    return User._fetch(cursor, as_rows)
+            
+            query, params = User._search_query(name, limit, fields, with_sort_key=True)
+            
+            def search(shard):
+                with get_db_connection(shard) as conn:
+                    cursor = conn.cursor()
+                    cursor.row_factory = None
+                    return cursor.execute(query, params).fetchall()
+            
+            rows = [row[1:] for row in merge_sorted(fan_out(search), itemgetter(0), limit)]
+            return rows if as_rows else [dict(zip(fields, row)) for row in rows]
+        except sqlite3.Error:
+            return None
+    
+    @staticmethod
+    def exists(user_id):
+        """Check if user exists"""
+        # Goes through get_by_id so the answer is served from (and warms) the cache
+        return User.get_by_id(user_id) is not None
+    
+    @staticmethod
+    def get_version():
+        """(version, updated_at epoch seconds) of the users table, bumped on every write"""
+        def version(shard):
+            with get_db_connection(shard) as conn:
+                return conn.execute(
+                    "SELECT version, updated_at FROM users_version WHERE id = 1"
+                ).fetchone()
+        
+        try:
+            # Counters only grow, so their sum changes whenever any shard does
+            rows = fan_out(version) if is_sharded() else [version(None)]
+        except sqlite3.Error:
+            return None
+        if any(row is None for row in rows):
+            return None
+        return sum(row['version'] for row in rows), max(row['updated_at'] for row in rows)
+    
+    @staticmethod
+    def cache_stats():
+        """Statistics for the user lookup cache"""
+        return _cache.stats() 
\ No newline at end of file
@@ -0,0 +1,169 @@
+from flask import Blueprint, g
+from app.config import Config
+from app.database.connection import run_db
+from app.models.user import User
+from app.routes.user_routes import (
+    _bulk_response, _conditional_user_response, _create_response, _delete_response, _drop_existing,
+    _list_etag, _login_success, _login_throttled, _page_response, _parse_login, _parse_page_args,
+    _parse_projection, _parse_search_args, _parse_user_data, _screen_bulk_rows, _search_response,
+    _stream_listing, _update_response, _user_response, _valid_user_id, _wants_stream
+)
+from app.utils.auth import hash_password_async, hash_passwords_async, verify_password_async
+from app.utils.validators import sanitize_input
+from app.utils.responses import (
+    success_response, error_response, conditional_response_async
+)
+from app.utils.tokens import bearer_token, load_token_identity, revoke_token, token_required
+import json
+
+# Same routes and responses as user_bp. Database calls run on the bounded
+# DB executor and bcrypt on the process pool, so neither is limited by, or
+# multiplied by, the number of request threads. Registered instead of
+# user_bp when ASYNC_VIEWS is on. Flask still runs each view on its request
+# thread (in an event loop of its own), so this does not let more requests
+# be in flight than there are threads.
+async_user_bp = Blueprint('async_users', __name__)
+async_user_bp.before_app_request(load_token_identity)
+
+@async_user_bp.route('/')
+async def home():
+    return "User Management System"
+
+@async_user_bp.route('/users', methods=['GET'])
+async def get_all_users():
+    after_id, limit, error = _parse_page_args()
+    if error:
+        return error
+    fields, columnar, error = _parse_projection()
+    if error:
+        return error
+    
+    async def build():
+        if _wants_stream():
+            # The response body is produced after the view returns, off the event loop
+            users = User.iter_all(after_id, limit, Config.STREAM_BATCH_SIZE, fields, columnar)
+            return _stream_listing(users, fields, columnar)
+        users = await run_db(User.get_all, after_id, limit, fields, columnar)
+        return _page_response(users, limit, fields, columnar)
+    
+    version = await run_db(User.get_version)
+    if version is None:
+        return await build()
+    return await conditional_response_async(_list_etag(version), None, build)
+
+@async_user_bp.route('/user/<user_id>', methods=['GET'])
+async def get_user(user_id):
+    if not _valid_user_id(user_id):
+        return error_response('Invalid user ID', 400)
+    
+    return _conditional_user_response(await run_db(User.get_by_id, user_id))
+
+@async_user_bp.route('/users', methods=['POST'])
+async def create_user():
+    try:
+        data, error = _parse_user_data(['name', 'email', 'password'])
+        if error:
+            return error
+        
+        name = sanitize_input(data['name'])
+        email = sanitize_input(data['email'])
+        hashed_password = await hash_password_async(data['password'])
+        
+        result, user_id = await run_db(User.create, name, email, hashed_password)
+        return _create_response(result)
+    
+    except json.JSONDecodeError:
+        return error_response('Invalid JSON format', 400)
+
+@async_user_bp.route('/users/bulk', methods=['POST'])
+async def bulk_create_users():
+    rows, results, pending, error = _screen_bulk_rows()
+    if error:
+        return error
+    
+    existing = await run_db(User.get_existing_emails, pending)
+    if existing is None:
+        return error_response('Database error', 500)
+    _drop_existing(results, pending, existing)
+    
+    indexes = [index for index, _ in pending.values()]
+    hashed_passwords = await hash_passwords_async(rows[index]['password'] for index in indexes)
+    to_insert = [
+        (name, email, hashed)
+        for (email, (_, name)), hashed in zip(pending.items(), hashed_passwords)
+    ]
+    
+    outcomes = await run_db(User.bulk_create, to_insert, Config.BULK_CHUNK_SIZE)
+    return _bulk_response(results, indexes, outcomes)
+
+@async_user_bp.route('/user/<user_id>', methods=['PUT'])
+async def update_user(user_id):
+    try:
+        if not _valid_user_id(user_id):
+            return error_response('Invalid user ID', 400)
+        
+        data, error = _parse_user_data(['name', 'email'])
+        if error:
+            return error
+        
+        name = sanitize_input(data['name'])
+        email = sanitize_input(data['email'])
+        
+        return _update_response(await run_db(User.update, user_id, name, email))
+    
+    except json.JSONDecodeError:
+        return error_response('Invalid JSON format', 400)
+
+@async_user_bp.route('/user/<user_id>', methods=['DELETE'])
+async def delete_user(user_id):
+    if not _valid_user_id(user_id):
+        return error_response('Invalid user ID', 400)
+    
+    return _delete_response(await run_db(User.delete, user_id))
+
+@async_user_bp.route('/search', methods=['GET'])
+async def search_users():
+    search_term, limit, error = _parse_search_args()
+    if error:
+        return error
+    fields, columnar, error = _parse_projection()
+    if error:
+        return error
+    
+    users = await run_db(User.search_by_name, search_term, limit, fields, columnar)
+    return _search_response(users, fields, columnar)
+
+@async_user_bp.route('/login', methods=['POST'])
+async def login():
+    try:
+        email, password, error = _parse_login()
+        if error:
+            return error
+        
+        throttled = _login_throttled(email)
+        if throttled:
+            return throttled
+        
+        user = await run_db(User.get_by_email, email)
+        
+        if user:
+            if await verify_password_async(password, user['password']):
+                return _login_success(user)
+            else:
+                return error_response('Invalid password', 401)
+        else:
+            return error_response('User not found', 404)
+    
+    except json.JSONDecodeError:
+        return error_response('Invalid JSON format', 400)
+
+@async_user_bp.route('/logout', methods=['POST'])
+@token_required
+async def logout():
+    revoke_token(bearer_token())
+    return success_response(message='Logout successful')
+
+@async_user_bp.route('/me', methods=['GET'])
+@token_required
+async def current_user():
+    return _user_response(await run_db(User.get_by_id, g.user_id))
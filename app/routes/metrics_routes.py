@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from app.utils.metrics import render_prometheus
+
+# Create Blueprint
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -1,174 +1,442 @@
-from flask import Blueprint, request, jsonify
-from app.models.user import User
-from app.utils.validators import validate_user_data, sanitize_input
-from app.utils.auth import hash_password, verify_password
-from app.utils.responses import success_response, error_response
-import json
-
-# Create Blueprint
-user_bp = Blueprint('users', __name__)
-
-@user_bp.route('/')
-def home():
-    return "User Management System"
-
-@user_bp.route('/users', methods=['GET'])
-def get_all_users():
-    users = User.get_all()
-    if users is None:
-        return error_response('Database error', 500)
-    return success_response(data={'users': users})
-
-@user_bp.route('/user/<user_id>', methods=['GET'])
-def get_user(user_id):
-    # Validate user_id is a positive integer
-    if not user_id.isdigit() or int(user_id) <= 0:
-        return error_response('Invalid user ID', 400)
-    
-    user = User.get_by_id(user_id)
-    if user:
-        return success_response(data={'user': user})
-    else:
-        return error_response('User not found', 404)
-
-@user_bp.route('/users', methods=['POST'])
-def create_user():
-    try:
-        data = request.get_json()
-        if not data:
-            return error_response('Invalid JSON data', 400)
-        
-        # Validate input data
-        is_valid, errors = validate_user_data(data, ['name', 'email', 'password'])
-        if not is_valid:
-            return error_response('Validation failed', 400, errors)
-        
-        # Check if email already exists
-        existing_user = User.get_by_email(data['email'].strip())
-        if existing_user:
-            return error_response('Email already exists', 409)
-        
-        # Sanitize and hash password
-        name = sanitize_input(data['name'])
-        email = sanitize_input(data['email'])
-        hashed_password = hash_password(data['password'])
-        
-        user_id = User.create(name, email, hashed_password)
-        if user_id is None:
-            return error_response('Failed to create user', 500)
-        
-        return success_response(message='User created successfully', status_code=201)
-        
-    except json.JSONDecodeError:
-        return error_response('Invalid JSON format', 400)
-
-@user_bp.route('/user/<user_id>', methods=['PUT'])
-def update_user(user_id):
-    try:
-        # Validate user_id
-        if not user_id.isdigit() or int(user_id) <= 0:
-            return error_response('Invalid user ID', 400)
-        
-        data = request.get_json()
-        if not data:
-            return error_response('Invalid JSON data', 400)
-        
-        # Validate input data (name and email only for updates)
-        is_valid, errors = validate_user_data(data, ['name', 'email'])
-        if not is_valid:
-            return error_response('Validation failed', 400, errors)
-        
-        # Check if user exists
-        if not User.exists(user_id):
-            return error_response('User not found', 404)
-        
-        # Check if email is already taken by another user
-        existing_user = User.get_by_email(data['email'].strip())
-        if existing_user and existing_user['id'] != int(user_id):
-            return error_response('Email already exists', 409)
-        
-        # Sanitize and update
-        name = sanitize_input(data['name'])
-        email = sanitize_input(data['email'])
-        
-        result = User.update(user_id, name, email)
-        if result is None:
-            return error_response('Email already exists', 409)
-        elif not result:
-            return error_response('Failed to update user', 500)
-        
-        return success_response(message='User updated successfully')
-        
-    except json.JSONDecodeError:
-        return error_response('Invalid JSON format', 400)
-
-@user_bp.route('/user/<user_id>', methods=['DELETE'])
-def delete_user(user_id):
-    # Validate user_id
-    if not user_id.isdigit() or int(user_id) <= 0:
-        return error_response('Invalid user ID', 400)
-    
-    # Check if user exists
-    if not User.exists(user_id):
-        return error_response('User not found', 404)
-    
-    if User.delete(user_id):
-        return success_response(message='User deleted successfully')
-    else:
-        return error_response('Failed to delete user', 500)
-
-@user_bp.route('/search', methods=['GET'])
-def search_users():
-    name = request.args.get('name')
-    
-    if not name or not name.strip():
-        return error_response('Please provide a name to search', 400)
-    
-    # Sanitize search term
-    search_term = sanitize_input(name)
-    if len(search_term) < 2:
-        return error_response('Search term must be at least 2 characters', 400)
-    
-    users = User.search_by_name(search_term)
-    if users is None:
-        return error_response('Database error', 500)
-    
-    return success_response(data={'users': users})
-
-@user_bp.route('/login', methods=['POST'])
-def login():
-    try:
-        data = request.get_json()
-        if not data:
-            return error_response('Invalid JSON data', 400)
-        
-        # Validate required fields
-        if not data.get('email') or not data.get('password'):
-            return error_response('Email and password are required', 400)
-        
-        # Validate email format
-        from app.utils.validators import validate_email_format
-        email_valid, email_error = validate_email_format(data['email'].strip())
-        if not email_valid:
-            return error_response(f'Email: {email_error}', 400)
-        
-        email = sanitize_input(data['email'])
-        password = data['password']
-        
-        user = User.get_by_email(email)
-        
-        if user:
-            # Verify the password against the stored hash
-            stored_password_hash = user['password']
-            if verify_password(password, stored_password_hash):
-                return success_response(
-                    data={'user_id': user['id']},
-                    message='Login successful'
-                )
-            else:
-                return error_response('Invalid password', 401)
-        else:
-            return error_response('User not found', 404)
-            
-    except json.JSONDecodeError:
-        return error_response('Invalid JSON format', 400) 
\ No newline at end of file
+from flask import Blueprint, g, request, jsonify
+from app.config import Config
+from app.models.user import User, WriteResult
+from app.utils.validators import (
+    validate_user_data, validate_many, validate_email_format, sanitize_input, parse_positive_int
+)
+from app.utils.auth import hash_password, hash_passwords, verify_password
+from app.utils.rate_limit import check_login_rate
+from app.utils.responses import (
+    success_response, error_response, streamed_success_response, conditional_response,
+    constant_error_response
+)
+from app.utils.tokens import (
+    bearer_token, generate_token, load_token_identity, revoke_token, token_required
+)
+import json
+import zlib
+
+# Create Blueprint
+user_bp = Blueprint('users', __name__)
+user_bp.before_app_request(load_token_identity)
+
+@user_bp.route('/')
+def home():
+    return "User Management System"
+
+# Request parsing and response building shared with the async views in
+# async_user_routes.py; only the database and bcrypt calls differ there.
+
+def _parse_page_args():
+    """(after_id, limit, error) from the listing query string"""
+    after_id = request.args.get('after_id')
+    if after_id is not None:
+        after_id = parse_positive_int(after_id)
+        if after_id is None:
+            return None, None, error_response('Invalid after_id', 400)
+    
+    limit = request.args.get('limit')
+    if limit is not None:
+        limit = parse_positive_int(limit)
+        if limit is None or limit > Config.MAX_PAGE_SIZE:
+            return None, None, error_response(f'Limit must be between 1 and {Config.MAX_PAGE_SIZE}', 400)
+    return after_id, limit, None
+
+def _parse_projection():
+    """(fields, columnar, error) from ?fields= and ?format=.
+    
+    `fields` selects a subset of User.PUBLIC_FIELDS (id is always kept, as
+    it is the paging cursor); `format=columnar` lists the column names once
+    and each user as an array instead of an object.
+    """
+    fields = User.PUBLIC_FIELDS
+    requested = request.args.get('fields')
+    if requested:
+        names = {name.strip() for name in requested.split(',') if name.strip()}
+        unknown = names - set(User.PUBLIC_FIELDS)
+        if unknown:
+            return None, None, error_response(f"Unknown fields: {', '.join(sorted(unknown))}", 400)
+        fields = tuple(field for field in User.PUBLIC_FIELDS if field == 'id' or field in names)
+    
+    output = request.args.get('format', 'objects').lower()
+    if output not in ('objects', 'columnar'):
+        return None, None, error_response("Format must be 'objects' or 'columnar'", 400)
+    return fields, output == 'columnar', None
+
+def _wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def _listing_data(users, fields, columnar):
+    if columnar:
+        return {'columns': list(fields), 'users': users}
+    return {'users': users}
+
+def _stream_listing(users, fields, columnar):
+    return streamed_success_response('users', users, extra={'columns': list(fields)} if columnar else None)
+
+def _page_response(users, limit, fields, columnar):
+    if users is None:
+        return error_response('Database error', 500)
+    
+    data = _listing_data(users, fields, columnar)
+    if limit is not None:
+        # Cursor for the next page; None once the last page has been served
+        data['next_after_id'] = None
+        if len(users) == limit:
+            data['next_after_id'] = users[-1][0] if columnar else users[-1]['id']
+    return success_response(data=data)
+
+def _list_etag(version):
+    return f'users-{version[0]}-{zlib.crc32(request.query_string):x}'
+
+@user_bp.route('/users', methods=['GET'])
+def get_all_users():
+    after_id, limit, error = _parse_page_args()
+    if error:
+        return error
+    fields, columnar, error = _parse_projection()
+    if error:
+        return error
+    
+    def build():
+        # Streaming keeps memory flat regardless of table size
+        if _wants_stream():
+            users = User.iter_all(after_id, limit, Config.STREAM_BATCH_SIZE, fields, columnar)
+            return _stream_listing(users, fields, columnar)
+        return _page_response(User.get_all(after_id, limit, fields, columnar), limit, fields, columnar)
+    
+    # Unchanged table -> 304 without touching the rows. No Last-Modified:
+    # updated_at only has 1-second precision, the change counter is exact
+    version = User.get_version()
+    if version is None:
+        return build()
+    return conditional_response(_list_etag(version), None, build)
+
+def _valid_user_id(user_id):
+    # isdigit() alone also accepts characters like '²' that int() rejects
+    return user_id.isascii() and user_id.isdigit() and int(user_id) > 0
+
+def _user_response(user):
+    if user:
+        return success_response(data={'user': user})
+    else:
+        return error_response('User not found', 404)
+
+def _conditional_user_response(user):
+    """_user_response() with an ETag derived from the row itself.
+    
+    The row may come from this process's cache, so the validator has to
+    describe exactly what is served rather than the database's current
+    version; it also keeps the lookup free of any extra query.
+    """
+    if not user:
+        return _user_response(user)
+    etag = f"user-{user['id']}-{zlib.crc32(repr(sorted(user.items())).encode('utf-8')):x}"
+    return conditional_response(etag, None, lambda: _user_response(user))
+
+@user_bp.route('/user/<user_id>', methods=['GET'])
+def get_user(user_id):
+    # Validate user_id is a positive integer
+    if not _valid_user_id(user_id):
+        return error_response('Invalid user ID', 400)
+    
+    return _conditional_user_response(User.get_by_id(user_id))
+
+def _parse_user_data(required_fields):
+    """(data, error) for a JSON user payload validated for `required_fields`"""
+    data = request.get_json()
+    if not data:
+        return None, error_response('Invalid JSON data', 400)
+    
+    is_valid, errors = validate_user_data(data, required_fields)
+    if not is_valid:
+        return None, error_response('Validation failed', 400, errors)
+    return data, None
+
+def _create_response(result):
+    if result is WriteResult.CONFLICT:
+        return error_response('Email already exists', 409)
+    elif result is not WriteResult.OK:
+        return error_response('Failed to create user', 500)
+    
+    return success_response(message='User created successfully', status_code=201)
+
+@user_bp.route('/users', methods=['POST'])
+def create_user():
+    try:
+        # Validate input data
+        data, error = _parse_user_data(['name', 'email', 'password'])
+        if error:
+            return error
+        
+        # Sanitize and hash password
+        name = sanitize_input(data['name'])
+        email = sanitize_input(data['email'])
+        hashed_password = hash_password(data['password'])
+        
+        # A single INSERT; the UNIQUE constraint reports duplicate emails
+        result, user_id = User.create(name, email, hashed_password)
+        return _create_response(result)
+        
+    except json.JSONDecodeError:
+        return error_response('Invalid JSON format', 400)
+
+def _read_bulk_rows():
+    """Read bulk rows from a JSON array or an NDJSON body.
+    
+    Returns (rows, error_message); an NDJSON line that is not valid JSON is
+    kept as None so it is reported against its own index.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        rows = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+        return rows, None
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        return None, 'Expected a JSON array of users or an NDJSON body'
+    return data, None
+
+def _screen_bulk_rows():
+    """Read and validate a bulk request before any database work.
+    
+    Returns (rows, results, pending, error): `results` holds the per-row
+    report so far and `pending` maps email -> (index, name) for the rows
+    still to be checked against existing users.
+    """
+    rows, read_error = _read_bulk_rows()
+    if read_error:
+        return None, None, None, error_response(read_error, 400)
+    if not rows:
+        return None, None, None, error_response('No users provided', 400)
+    if len(rows) > Config.BULK_MAX_ROWS:
+        return None, None, None, error_response(f'At most {Config.BULK_MAX_ROWS} users per request', 413)
+    
+    results = [None] * len(rows)
+    pending = {}  # email -> (index, name)
+    
+    # Validate every row and catch duplicates within the batch itself
+    validations = validate_many(rows, ['name', 'email', 'password'])
+    for index, (row, (is_valid, errors)) in enumerate(zip(rows, validations)):
+        if not is_valid:
+            results[index] = {'index': index, 'status': 'invalid', 'errors': errors}
+            continue
+        email = sanitize_input(row['email'])
+        if email in pending:
+            results[index] = {'index': index, 'status': 'conflict', 'errors': ['Duplicate email in request']}
+            continue
+        pending[email] = (index, sanitize_input(row['name']))
+    return rows, results, pending, None
+
+def _drop_existing(results, pending, existing):
+    for email in existing:
+        index, _ = pending.pop(email)
+        results[index] = {'index': index, 'status': 'conflict', 'errors': ['Email already exists']}
+
+def _bulk_response(results, indexes, outcomes):
+    for index, outcome in zip(indexes, outcomes):
+        if outcome is WriteResult.OK:
+            results[index] = {'index': index, 'status': 'created'}
+        elif outcome is WriteResult.CONFLICT:
+            results[index] = {'index': index, 'status': 'conflict', 'errors': ['Email already exists']}
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': ['Failed to create user']}
+    
+    created = sum(1 for result in results if result['status'] == 'created')
+    return success_response(
+        data={'created': created, 'failed': len(results) - created, 'results': results},
+        message=f'{created} of {len(results)} users created'
+    )
+
+@user_bp.route('/users/bulk', methods=['POST'])
+def bulk_create_users():
+    rows, results, pending, error = _screen_bulk_rows()
+    if error:
+        return error
+    
+    # One set-based lookup for conflicts with existing users
+    existing = User.get_existing_emails(pending)
+    if existing is None:
+        return error_response('Database error', 500)
+    _drop_existing(results, pending, existing)
+    
+    indexes = [index for index, _ in pending.values()]
+    hashed_passwords = hash_passwords(rows[index]['password'] for index in indexes)
+    to_insert = [
+        (name, email, hashed)
+        for (email, (_, name)), hashed in zip(pending.items(), hashed_passwords)
+    ]
+    
+    outcomes = User.bulk_create(to_insert, chunk_size=Config.BULK_CHUNK_SIZE)
+    return _bulk_response(results, indexes, outcomes)
+
+def _update_response(result):
+    if result is WriteResult.NOT_FOUND:
+        return error_response('User not found', 404)
+    elif result is WriteResult.CONFLICT:
+        return error_response('Email already exists', 409)
+    elif result is not WriteResult.OK:
+        return error_response('Failed to update user', 500)
+    
+    return success_response(message='User updated successfully')
+
+@user_bp.route('/user/<user_id>', methods=['PUT'])
+def update_user(user_id):
+    try:
+        # Validate user_id
+        if not _valid_user_id(user_id):
+            return error_response('Invalid user ID', 400)
+        
+        # Validate input data (name and email only for updates)
+        data, error = _parse_user_data(['name', 'email'])
+        if error:
+            return error
+        
+        # Sanitize and update; one UPDATE tells us about missing users
+        # and emails taken by someone else
+        name = sanitize_input(data['name'])
+        email = sanitize_input(data['email'])
+        
+        result = User.update(user_id, name, email)
+        return _update_response(result)
+        
+    except json.JSONDecodeError:
+        return error_response('Invalid JSON format', 400)
+
+def _delete_response(result):
+    if result is WriteResult.OK:
+        return success_response(message='User deleted successfully')
+    elif result is WriteResult.NOT_FOUND:
+        return error_response('User not found', 404)
+    else:
+        return error_response('Failed to delete user', 500)
+
+@user_bp.route('/user/<user_id>', methods=['DELETE'])
+def delete_user(user_id):
+    # Validate user_id
+    if not _valid_user_id(user_id):
+        return error_response('Invalid user ID', 400)
+    
+    return _delete_response(User.delete(user_id))
+
+def _parse_search_args():
+    """(search_term, limit, error) from the search query string"""
+    name = request.args.get('name')
+    
+    if not name or not name.strip():
+        return None, None, error_response('Please provide a name to search', 400)
+    
+    # Sanitize search term
+    search_term = sanitize_input(name)
+    if len(search_term) < 2:
+        return None, None, error_response('Search term must be at least 2 characters', 400)
+    
+    limit = request.args.get('limit')
+    if limit is None:
+        limit = Config.SEARCH_RESULT_LIMIT
+    else:
+        limit = parse_positive_int(limit)
+        if limit is None or limit > Config.SEARCH_RESULT_LIMIT:
+            return None, None, error_response(f'Limit must be between 1 and {Config.SEARCH_RESULT_LIMIT}', 400)
+    return search_term, limit, None
+
+def _search_response(users, fields, columnar):
+    if users is None:
+        return error_response('Database error', 500)
+    
+    return success_response(data=_listing_data(users, fields, columnar))
+
+@user_bp.route('/search', methods=['GET'])
+def search_users():
+    search_term, limit, error = _parse_search_args()
+    if error:
+        return error
+    fields, columnar, error = _parse_projection()
+    if error:
+        return error
+    
+    users = User.search_by_name(search_term, limit, fields, columnar)
+    return _search_response(users, fields, columnar)
+
+def _parse_login():
+    """(email, password, error) from a login request"""
+    data = request.get_json()
+    if not data:
+        return None, None, error_response('Invalid JSON data', 400)
+    
+    # Validate required fields
+    if not data.get('email') or not data.get('password'):
+        return None, None, error_response('Email and password are required', 400)
+    
+    # Validate email format
+    email_valid, email_error = validate_email_format(data['email'].strip())
+    if not email_valid:
+        return None, None, error_response(f'Email: {email_error}', 400)
+    
+    return sanitize_input(data['email']), data['password'], None
+
+def _login_throttled(email):
+    """429 response when this client or email is over its login budget, else None"""
+    retry_after = check_login_rate(email, request.remote_addr)
+    if not retry_after:
+        return None
+    response = constant_error_response('Too many login attempts, please retry later', 429)
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def _login_success(user):
+    # Later calls present this token instead of the password
+    return success_response(
+        data={
+            'user_id': user['id'],
+            'token': generate_token(user['id']),
+            'expires_in': Config.TOKEN_TTL_SECONDS
+        },
+        message='Login successful'
+    )
+
+@user_bp.route('/login', methods=['POST'])
+def login():
+    try:
+        email, password, error = _parse_login()
+        if error:
+            return error
+        
+        # Throttle before any lookup or bcrypt work is spent on the attempt
+        throttled = _login_throttled(email)
+        if throttled:
+            return throttled
+        
+        user = User.get_by_email(email)
+        
+        if user:
+            # Verify the password against the stored hash
+            stored_password_hash = user['password']
+            if verify_password(password, stored_password_hash):
+                return _login_success(user)
+            else:
+                return error_response('Invalid password', 401)
+        else:
+            return error_response('User not found', 404)
+            
+    except json.JSONDecodeError:
+        return error_response('Invalid JSON format', 400)
+
+@user_bp.route('/logout', methods=['POST'])
+@token_required
+def logout():
+    revoke_token(bearer_token())
+    return success_response(message='Logout successful')
+
+@user_bp.route('/me', methods=['GET'])
+@token_required
+def current_user():
+    # Identity comes from the token alone; only the profile is looked up
+    return _user_response(User.get_by_id(g.user_id))
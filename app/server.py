@@ -0,0 +1,225 @@
+"""
+Pre-forking production server.
+
+The application is created once in the master process (migrations run
+once, imports are shared copy-on-write), then WORKERS processes are forked
+that accept connections from a single shared listening socket. Each
+worker opens its own database pool and serves requests on threads.
+
+Signals to the master:
+    SIGTERM / SIGINT  stop accepting, let in-flight requests finish
+                      (up to GRACEFUL_TIMEOUT seconds), then exit
+    SIGHUP            start a fresh set of workers, then drain the old ones
+
+Workers that die unexpectedly are replaced. Platforms without fork() fall
+back to Flask's threaded server.
+"""
+
+import errno
+import os
+import select
+import signal
+import socket
+import threading
+import time
+import traceback
+from werkzeug.serving import make_server
+from app.config import Config
+from app.database.connection import close_pool, shutdown_db_executor
+from app.database.sharding import shutdown_shard_executor
+from app.database.writer import shutdown_writer
+from app.utils.auth import bcrypt_pool
+
+LISTEN_BACKLOG = 2048
+
+def _close_process_resources():
+    """Drop state that must not be shared across fork()"""
+    shutdown_writer()  # Commit queued writes while the pool is still open
+    close_pool()
+    shutdown_db_executor()
+    shutdown_shard_executor()
+    bcrypt_pool.shutdown()
+
+class PreforkServer:
+    """Master process that forks and supervises worker processes"""
+    
+    def __init__(self, app, host, port, workers, graceful_timeout):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.graceful_timeout = graceful_timeout
+        self.socket = None
+        self._children = set()  # Current generation of workers
+        self._retiring = {}  # pid -> time by which it must have exited
+        self._signals = []
+        self._stopping = False
+        self._respawn_after = 0.0  # Back off when workers crash at startup
+    
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(LISTEN_BACKLOG)
+        # Every worker polls this socket; non-blocking accept lets the ones
+        # that lose the race go back to polling instead of hanging in accept()
+        sock.setblocking(False)
+        sock.set_inheritable(True)
+        return sock
+    
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+    
+    def _spawn_worker(self):
+        pid = os.fork()
+        if pid:
+            self._children.add(pid)
+            return
+        
+        code = 0
+        try:
+            self._run_worker()
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)  # Never fall back into the master's loop
+    
+    def _run_worker(self):
+        signal.set_wakeup_fd(-1)
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        
+        server = make_server(self.host, self.port, self.app, threaded=True, fd=self.socket.fileno())
+        server.socket.setblocking(False)
+        server.daemon_threads = False  # server_close() then waits for in-flight requests
+        
+        def drain(signum, frame):
+            # shutdown() blocks until serve_forever() returns, so not on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        signal.signal(signal.SIGTERM, drain)
+        signal.signal(signal.SIGINT, drain)
+        
+        try:
+            server.serve_forever()
+        finally:
+            _close_process_resources()
+    
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self._children:
+                self._children.discard(pid)
+                if not self._stopping:
+                    print(f"Worker {pid} exited unexpectedly (status {status}), replacing it")
+                    self._respawn_after = time.monotonic() + 1.0
+            self._retiring.pop(pid, None)
+    
+    def _kill_overdue(self):
+        now = time.monotonic()
+        for pid, deadline in list(self._retiring.items()):
+            if now >= deadline:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                self._retiring[pid] = float('inf')  # Only kill once
+    
+    def _retire(self, pids):
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                continue
+            self._retiring[pid] = deadline
+    
+    def _reload(self):
+        print(f"Reloading: starting {self.workers} new workers")
+        old = set(self._children)
+        self._children.clear()
+        for _ in range(self.workers):
+            self._spawn_worker()
+        self._retire(old)
+    
+    def _wait(self, timeout):
+        try:
+            select.select([self._wakeup_read], [], [], timeout)
+        except InterruptedError:
+            pass
+        try:
+            while os.read(self._wakeup_read, 512):
+                pass
+        except BlockingIOError:
+            pass
+    
+    def run(self):
+        self.socket = self._bind()
+        # Each worker must build its own connection pool and bcrypt executor
+        _close_process_resources()
+        
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        signal.set_wakeup_fd(self._wakeup_write)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+        
+        print(f"Master {os.getpid()} listening on http://{self.host}:{self.port} with {self.workers} workers")
+        try:
+            while True:
+                if time.monotonic() >= self._respawn_after:
+                    while len(self._children) < self.workers:
+                        self._spawn_worker()
+                
+                self._wait(1.0)
+                signals, self._signals = self._signals, []
+                if signal.SIGTERM in signals or signal.SIGINT in signals:
+                    break
+                if signal.SIGHUP in signals:
+                    self._reload()
+                self._reap()
+                self._kill_overdue()
+        finally:
+            self._stop()
+    
+    def _stop(self):
+        self._stopping = True
+        print("Shutting down: draining workers")
+        self._retire(self._children)
+        self._children.clear()
+        while self._retiring:
+            self._reap()
+            self._kill_overdue()
+            if self._retiring:
+                self._wait(0.1)
+        self.socket.close()
+        signal.set_wakeup_fd(-1)
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+        print("All workers stopped")
+
+def serve(app, host=None, port=None, workers=None):
+    """Serve `app` with pre-forked workers (Flask's threaded server without fork)"""
+    host = host or Config.HOST
+    port = Config.PORT if port is None else port
+    workers = Config.WORKERS if workers is None else workers
+    
+    if not hasattr(os, 'fork'):
+        print("fork() is unavailable on this platform; using the threaded development server")
+        app.run(host=host, port=port, threaded=True)
+        return
+    
+    try:
+        PreforkServer(app, host, port, workers, Config.GRACEFUL_TIMEOUT).run()
+    except OSError as e:
+        if e.errno == errno.EADDRINUSE:
+            raise RuntimeError(f"Port {port} is already in use") from e
+        raise
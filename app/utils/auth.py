@@ -1,9 +1,247 @@
-import bcrypt
-
-def hash_password(password):
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
-def verify_password(password, hashed_password):
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password) 
\ No newline at end of file
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import partial
+import bcrypt
+from app.config import Config
+from app.utils.metrics import observe
+
+class AuthBusyError(Exception):
+    """Raised when the bcrypt work queue is full or too slow"""
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
+def _check(password, hashed_password):
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+class BcryptPool:
+    """Bounded process pool that keeps bcrypt off the request threads.
+    
+    At most `workers + max_queue` jobs are admitted at once; anything beyond
+    that is rejected immediately with AuthBusyError instead of queueing, so a
+    burst of logins cannot tie up every request thread.
+    """
+    
+    def __init__(self, workers, max_queue, timeout):
+        self.workers = workers
+        self.capacity = max(1, workers) + max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+    
+    def _get_executor(self):
+        # A forked worker must not reuse its parent's executor
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self._executor_pid = os.getpid()
+        return self._executor
+    
+    def _acquire(self, op):
+        """Reserve a queue slot for one job; returns its start time"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise AuthBusyError("Password hashing queue is full")
+        
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+        return time.perf_counter()
+    
+    def _release(self, op, start):
+        """Free a job's slot and record its latency"""
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+            self._total_latency += elapsed
+            self._max_latency = max(self._max_latency, elapsed)
+        self._slots.release()
+        observe('bcrypt_duration_seconds', elapsed, (('op', op),))
+    
+    @contextmanager
+    def _admit(self, op):
+        """Hold a queue slot for the duration of the block"""
+        start = self._acquire(op)
+        try:
+            yield
+        finally:
+            self._release(op, start)
+    
+    def _submit(self, op, func, *args):
+        """Admit one job and start it on the pool; its slot is freed when it finishes"""
+        start = self._acquire(op)
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release(op, start)
+            raise
+        future.add_done_callback(lambda _: self._release(op, start))
+        return future
+    
+    def _timed_out(self, futures):
+        """Cancel `futures` that have not started and count a timeout"""
+        for future in futures:
+            future.cancel()
+        with self._lock:
+            self._timeouts += 1
+        return AuthBusyError("Password hashing timed out")
+    
+    def run(self, op, func, *args):
+        """Run `func(*args)` on the pool and wait for its result.
+        
+        A job that times out keeps its slot until the pool is done with it
+        (cancelled if it has not started), so timeouts never let more work
+        in than the queue allows.
+        """
+        if self.workers <= 0:
+            with self._admit(op):
+                return func(*args)
+        future = self._submit(op, func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise self._timed_out([future])
+    
+    def map(self, op, func, items):
+        """Run `func` over `items` on all workers, admitting each item as its own job.
+        
+        At most one item per worker is in the pool at a time, so a bulk
+        request never puts more than that ahead of an interactive hash or
+        verify, and it is rejected like any other job once the queue is full.
+        """
+        items = list(items)
+        if self.workers <= 0:
+            with self._admit(op):
+                return [func(item) for item in items]
+        results = []
+        window = deque()
+        try:
+            for item in items:
+                if len(window) >= self.workers:
+                    results.append(window[0].result(timeout=self.timeout))
+                    window.popleft()
+                window.append(self._submit(op, func, item))
+            while window:
+                results.append(window[0].result(timeout=self.timeout))
+                window.popleft()
+        except FutureTimeoutError:
+            raise self._timed_out(window)
+        except AuthBusyError:
+            for future in window:
+                future.cancel()
+            raise
+        return results
+    
+    async def run_async(self, op, func, *args):
+        """run() for async views: waits for the result without blocking the event loop"""
+        if self.workers <= 0:
+            with self._admit(op):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, func, *args)
+        future = self._submit(op, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out([future])
+    
+    async def map_async(self, op, func, items):
+        """map() for async views"""
+        items = list(items)
+        if self.workers <= 0:
+            with self._admit(op):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, lambda: [func(item) for item in items])
+        results = []
+        window = deque()
+        try:
+            for item in items:
+                if len(window) >= self.workers:
+                    results.append(await asyncio.wait_for(asyncio.wrap_future(window[0]), self.timeout))
+                    window.popleft()
+                window.append(self._submit(op, func, item))
+            while window:
+                results.append(await asyncio.wait_for(asyncio.wrap_future(window[0]), self.timeout))
+                window.popleft()
+        except asyncio.TimeoutError:
+            raise self._timed_out(window)
+        except AuthBusyError:
+            for future in window:
+                future.cancel()
+            raise
+        return results
+    
+    def shutdown(self):
+        """Stop the worker processes (they restart on next use)"""
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def stats(self):
+        """Queue depth and latency statistics for monitoring"""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'in_flight': self._in_flight,
+                'queue_depth': max(0, self._in_flight - max(1, self.workers)),
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'avg_latency_seconds': self._total_latency / self._completed if self._completed else 0.0,
+                'max_latency_seconds': self._max_latency
+            }
+
+bcrypt_pool = BcryptPool(Config.BCRYPT_WORKERS, Config.BCRYPT_MAX_QUEUE, Config.BCRYPT_TIMEOUT)
+
+def hash_password(password):
+    """Hash a password using bcrypt"""
+    return bcrypt_pool.run('hash', _hash, password, Config.BCRYPT_ROUNDS)
+
+def hash_passwords(passwords):
+    """Hash many passwords, spread across the bcrypt workers"""
+    return bcrypt_pool.map('hash_many', partial(_hash, rounds=Config.BCRYPT_ROUNDS), passwords)
+
+def verify_password(password, hashed_password):
+    """Verify a password against its hash"""
+    return bcrypt_pool.run('verify', _check, password, hashed_password)
+
+async def hash_password_async(password):
+    """hash_password() for async views"""
+    return await bcrypt_pool.run_async('hash', _hash, password, Config.BCRYPT_ROUNDS)
+
+async def hash_passwords_async(passwords):
+    """hash_passwords() for async views"""
+    return await bcrypt_pool.map_async('hash_many', partial(_hash, rounds=Config.BCRYPT_ROUNDS), passwords)
+
+async def verify_password_async(password, hashed_password):
+    """verify_password() for async views"""
+    return await bcrypt_pool.run_async('verify', _check, password, hashed_password)
+
+def get_auth_stats():
+    """bcrypt pool statistics for monitoring"""
+    return bcrypt_pool.stats()
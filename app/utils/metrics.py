@@ -0,0 +1,140 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import g, request
+
+# Latency buckets in seconds, from sub-millisecond DB work up to slow bcrypt
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_request_duration_seconds': 'Request latency by endpoint, method and status',
+    'db_connection_wait_seconds': 'Time spent waiting for a pooled database connection',
+    'db_connection_hold_seconds': 'Time a pooled database connection was held',
+    'bcrypt_duration_seconds': 'bcrypt hash/verify latency including queueing',
+    'json_serialize_seconds': 'Time spent serializing JSON responses',
+    'db_write_batch_size': 'Writes committed together by the group-commit writer',
+    'db_write_commit_seconds': 'Time to apply and commit one group-commit batch',
+    'db_write_latency_seconds': 'Time from submitting a write to its batch being committed',
+}
+
+class Histogram:
+    """Fixed-bucket latency histogram"""
+    
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+enabled = True
+_histograms = {}  # (name, labels) -> Histogram; labels is a tuple of (key, value)
+_collectors = {}  # prefix -> callable returning a dict of numbers
+_lock = threading.Lock()
+
+def configure_metrics(config):
+    global enabled
+    enabled = config.METRICS_ENABLED
+
+def observe(name, value, labels=(), buckets=DEFAULT_BUCKETS):
+    """Record one observation; `labels` is a tuple of (key, value) pairs"""
+    if not enabled:
+        return
+    key = (name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram(buckets)
+        histogram.observe(value)
+
+@contextmanager
+def timer(name, labels=()):
+    """Time the body of a `with` block into a histogram"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, labels)
+
+def register_collector(prefix, collect):
+    """Export the numeric values of `collect()` as gauges named prefix_<key>"""
+    _collectors[prefix] = collect
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        snapshot = sorted(
+            (name, labels, list(h.counts), h.sum, h.count, h.buckets)
+            for (name, labels), h in _histograms.items()
+        )
+    
+    lines = []
+    current = None
+    for name, labels, counts, total, count, buckets in snapshot:
+        if name != current:
+            current = name
+            lines.append(f'# HELP {name} {HELP.get(name, name)}')
+            lines.append(f'# TYPE {name} histogram')
+        cumulative = 0
+        for bound, bucket_count in zip(buckets + (float('inf'),), counts):
+            cumulative += bucket_count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{_format_labels(labels, ("le", le))} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+        lines.append(f'{name}_count{_format_labels(labels)} {count}')
+    
+    for prefix, collect in sorted(_collectors.items()):
+        try:
+            values = collect()
+        except Exception:
+            continue  # A failing collector must not break the endpoint
+        for key, value in sorted(values.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {value}')
+    return '\n'.join(lines) + '\n'
+
+def install_request_metrics(app, slow_request_ms=0):
+    """Time every request per endpoint and log requests slower than the threshold"""
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request_time(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        observe('http_request_duration_seconds', elapsed, (
+            ('endpoint', request.endpoint or 'unmatched'),
+            ('method', request.method),
+            ('status', response.status_code),
+        ))
+        if slow_request_ms and elapsed * 1000 >= slow_request_ms:
+            app.logger.warning(
+                'Slow request: %s %s -> %s in %.1f ms',
+                request.method, request.full_path, response.status_code, elapsed * 1000
+            )
+        return response
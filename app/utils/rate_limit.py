@@ -0,0 +1,97 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+class TokenBucketLimiter:
+    """Token bucket per key, kept in a size-bounded LRU.
+    
+    Each key may make `burst` attempts at once and regains `rate` attempts
+    per second. Buckets are ordered by last use, so idle ones sit at the
+    front: cleanup pops them off until it meets one still refilling, and
+    the least recently used bucket is evicted once `max_keys` is reached.
+    """
+    
+    def __init__(self, rate, burst, max_keys, cleanup_interval=60.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_keys = max(1, max_keys)
+        self.cleanup_interval = cleanup_interval
+        self._refill_time = self.burst / rate if rate > 0 else float('inf')
+        self._buckets = OrderedDict()  # key -> [tokens, last update]
+        self._lock = threading.Lock()
+        self._next_cleanup = time.monotonic() + cleanup_interval
+        self._allowed = 0
+        self._rejected = 0
+        self._evicted = 0
+    
+    def hit(self, key):
+        """Take one token for `key`; returns 0 if allowed, else seconds until retry"""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_cleanup:
+                self._cleanup(now)
+            
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self._evicted += 1
+                bucket = self._buckets[key] = [float(self.burst), now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self._allowed += 1
+                return 0
+            self._rejected += 1
+            return (1 - bucket[0]) / self.rate if self.rate > 0 else self.cleanup_interval
+    
+    def _cleanup(self, now):
+        # Buckets idle long enough to be full again hold no state worth keeping
+        while self._buckets:
+            key, (tokens, updated) = next(iter(self._buckets.items()))
+            if now - updated < self._refill_time:
+                break
+            del self._buckets[key]
+        self._next_cleanup = now + self.cleanup_interval
+    
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                'tracked_keys': len(self._buckets),
+                'allowed': self._allowed,
+                'rejected': self._rejected,
+                'evicted': self._evicted
+            }
+
+login_ip_limiter = TokenBucketLimiter(
+    Config.LOGIN_IP_PER_MINUTE / 60, Config.LOGIN_IP_BURST, Config.RATE_LIMIT_MAX_KEYS
+)
+login_email_limiter = TokenBucketLimiter(
+    Config.LOGIN_EMAIL_PER_MINUTE / 60, Config.LOGIN_EMAIL_BURST, Config.RATE_LIMIT_MAX_KEYS
+)
+
+def check_login_rate(email, client_ip):
+    """Seconds the client must wait before another login attempt (0 when allowed)"""
+    if not Config.LOGIN_RATE_LIMIT_ENABLED:
+        return 0
+    # The per-IP bucket is checked first so a blocked client spends no email tokens
+    retry_after = login_ip_limiter.hit(client_ip or 'unknown')
+    if not retry_after:
+        retry_after = login_email_limiter.hit(email.lower())
+    return math.ceil(retry_after)
+
+def get_login_rate_stats():
+    """Per-IP and per-email limiter counters for monitoring"""
+    ip_stats = login_ip_limiter.stats()
+    email_stats = login_email_limiter.stats()
+    return {
+        **{f'ip_{key}': value for key, value in ip_stats.items()},
+        **{f'email_{key}': value for key, value in email_stats.items()}
+    }
@@ -1,21 +1,146 @@
-from flask import jsonify
-
-def success_response(data=None, message="Success", status_code=200):
-    """Standardized success response"""
-    response = {
-        'status': 'success',
-        'message': message
-    }
-    if data is not None:
-        response['data'] = data
-    return jsonify(response), status_code
-
-def error_response(message, status_code=400, errors=None):
-    """Standardized error response"""
-    response = {
-        'status': 'error',
-        'message': message
-    }
-    if errors:
-        response['errors'] = errors
-    return jsonify(response), status_code 
\ No newline at end of file
+import json
+from functools import lru_cache
+from datetime import datetime, timezone
+from flask import Response, current_app, jsonify, make_response, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from app.utils.metrics import timer
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; the stdlib encoder is used without it
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson when installed.
+    
+    Falls back to compact stdlib json. Keys are not sorted, and responses
+    are built straight from bytes, skipping a str round trip.
+    """
+    
+    sort_keys = False
+    
+    def dumps_bytes(self, obj):
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default)
+            except TypeError:
+                pass  # e.g. non-string dict keys; let the stdlib handle it
+        return json.dumps(
+            obj, default=self.default, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+    
+    def response(self, *args, **kwargs):
+        if self._app.debug:
+            return super().response(*args, **kwargs)  # Keep pretty output in debug
+        obj = self._prepare_response_obj(args, kwargs)
+        with timer('json_serialize_seconds'):
+            body = self.dumps_bytes(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+@lru_cache(maxsize=256)
+def _encoded_error(message):
+    """Error bodies without details depend only on the message; encode each once"""
+    return json.dumps({'status': 'error', 'message': message}, separators=(',', ':')).encode('utf-8')
+
+def constant_error_response(message, status_code):
+    """Error response from a cached pre-encoded body (no serialization per request)"""
+    return Response(_encoded_error(message), status=status_code, mimetype='application/json')
+
+def success_response(data=None, message="Success", status_code=200):
+    """Standardized success response"""
+    response = {
+        'status': 'success',
+        'message': message
+    }
+    if data is not None:
+        response['data'] = data
+    return jsonify(response), status_code
+
+def error_response(message, status_code=400, errors=None):
+    """Standardized error response"""
+    if not errors:
+        return constant_error_response(message, status_code)
+    response = {
+        'status': 'error',
+        'message': message,
+        'errors': errors
+    }
+    return jsonify(response), status_code
+
+def streamed_success_response(key, items, message="Success", extra=None):
+    """Success response whose `data[key]` list is streamed item by item.
+    
+    Entries of `extra` are written into `data` ahead of the list.
+    """
+    dumps = current_app.json.dumps
+    
+    def generate():
+        envelope = dumps({'status': 'success', 'message': message})
+        head = dumps(extra)[1:-1] + ',' if extra else ''
+        yield envelope[:-1] + ',"data":{%s"%s":[' % (head, key)
+        first = True
+        for item in items:
+            if not first:
+                yield ','
+            first = False
+            yield dumps(item)
+        yield ']}}'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def _http_date(epoch_seconds):
+    if epoch_seconds is None:
+        return None
+    return datetime.fromtimestamp(epoch_seconds, tz=timezone.utc)
+
+def _client_is_fresh(etag, last_modified):
+    """Whether the request's validators match the current representation"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True  # Always revalidate, cheaply
+    return response
+
+def conditional_response(etag, last_modified, build):
+    """Answer 304 when the client already has this representation.
+    
+    `etag` and `last_modified` (epoch seconds, or None to send no
+    Last-Modified) describe the current data; `build` is only called, and
+    the rows only queried and serialized, when the client's copy is stale.
+    Validators are attached to 200 responses.
+    """
+    last_modified = _http_date(last_modified)
+    if _client_is_fresh(etag, last_modified):
+        return _with_validators(Response(status=304), etag, last_modified)
+    
+    response = make_response(build())
+    if response.status_code != 200:
+        return response
+    return _with_validators(response, etag, last_modified)
+
+async def conditional_response_async(etag, last_modified, build):
+    """conditional_response() for async views; `build` is a coroutine function"""
+    last_modified = _http_date(last_modified)
+    if _client_is_fresh(etag, last_modified):
+        return _with_validators(Response(status=304), etag, last_modified)
+    
+    response = make_response(await build())
+    if response.status_code != 200:
+        return response
+    return _with_validators(response, etag, last_modified)
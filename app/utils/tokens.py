@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import hmac
+import inspect
+import json
+import secrets
+import threading
+import time
+from functools import wraps
+from flask import g, request
+from app.config import Config
+from app.utils.responses import error_response
+
+# Revoked token ids mapped to their expiry, so entries can be pruned
+_revoked = {}
+_revoked_lock = threading.Lock()
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _sign(body):
+    digest = hmac.new(Config.SECRET_KEY.encode('utf-8'), body.encode('ascii'), hashlib.sha256).digest()
+    return _b64encode(digest)
+
+def generate_token(user_id, ttl=None):
+    """Issue a signed token for a user: base64(payload).base64(HMAC-SHA256)"""
+    ttl = Config.TOKEN_TTL_SECONDS if ttl is None else ttl
+    payload = {
+        'uid': user_id,
+        'exp': int(time.time()) + ttl,
+        'jti': secrets.token_urlsafe(8)
+    }
+    body = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    return f"{body}.{_sign(body)}"
+
+def verify_token(token):
+    """Return the token payload if the signature, expiry and revocation check pass, else None"""
+    try:
+        body, signature = token.split('.')
+        if not hmac.compare_digest(signature, _sign(body)):
+            return None
+        payload = json.loads(_b64decode(body))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    
+    if payload.get('exp', 0) < time.time():
+        return None
+    if _revoked and payload.get('jti') in _revoked:
+        return None
+    return payload
+
+def revoke_token(token):
+    """Revoke a valid token until it would have expired anyway"""
+    payload = verify_token(token)
+    if payload is None:
+        return False
+    
+    now = time.time()
+    with _revoked_lock:
+        # Expired tokens are rejected on their own, so forget them
+        for jti in [jti for jti, exp in _revoked.items() if exp < now]:
+            del _revoked[jti]
+        _revoked[payload['jti']] = payload['exp']
+    return True
+
+def bearer_token():
+    """The bearer token from the Authorization header, if any"""
+    header = request.headers.get('Authorization', '')
+    if header[:7].lower() == 'bearer ':
+        return header[7:].strip()
+    return None
+
+def load_token_identity():
+    """Request hook: set g.user_id from a valid bearer token (None otherwise)"""
+    token = bearer_token()
+    payload = verify_token(token) if token else None
+    g.user_id = payload['uid'] if payload else None
+    g.token_payload = payload
+
+def token_required(view):
+    """Reject requests that do not carry a valid bearer token"""
+    if inspect.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            if g.get('user_id') is None:
+                return error_response('Valid authentication token required', 401)
+            return await view(*args, **kwargs)
+        return async_wrapper
+    
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if g.get('user_id') is None:
+            return error_response('Valid authentication token required', 401)
+        return view(*args, **kwargs)
+    return wrapper
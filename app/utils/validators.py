@@ -1,93 +1,157 @@
-import re
-from email_validator import validate_email, EmailNotValidError
-from app.config import Config
-
-def validate_email_format(email):
-    """Validate email format using email-validator"""
-    try:
-        validate_email(email)
-        return True, None
-    except EmailNotValidError as e:
-        return False, str(e)
-
-def validate_password_strength(password):
-    """Validate password strength"""
-    errors = []
-    
-    if len(password) < Config.MIN_PASSWORD_LENGTH:
-        errors.append(f"Password must be at least {Config.MIN_PASSWORD_LENGTH} characters long")
-    
-    if Config.REQUIRE_UPPERCASE and not re.search(r'[A-Z]', password):
-        errors.append("Password must contain at least one uppercase letter")
-    
-    if Config.REQUIRE_LOWERCASE and not re.search(r'[a-z]', password):
-        errors.append("Password must contain at least one lowercase letter")
-    
-    if Config.REQUIRE_NUMBERS and not re.search(r'\d', password):
-        errors.append("Password must contain at least one number")
-    
-    if Config.REQUIRE_SPECIAL_CHARS and not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-        errors.append("Password must contain at least one special character")
-    
-    return len(errors) == 0, errors
-
-def validate_name(name):
-    """Validate user name"""
-    if not name or not name.strip():
-        return False, "Name cannot be empty"
-    
-    if len(name.strip()) < Config.MIN_NAME_LENGTH:
-        return False, f"Name must be at least {Config.MIN_NAME_LENGTH} characters long"
-    
-    if len(name.strip()) > Config.MAX_NAME_LENGTH:
-        return False, f"Name cannot exceed {Config.MAX_NAME_LENGTH} characters"
-    
-    # Check for valid characters (letters, spaces, hyphens, apostrophes)
-    if not re.match(r"^[a-zA-Z\s\-']+$", name.strip()):
-        return False, "Name can only contain letters, spaces, hyphens, and apostrophes"
-    
-    return True, None
-
-def sanitize_input(data):
-    """Sanitize input data by trimming whitespace"""
-    if isinstance(data, str):
-        return data.strip()
-    return data
-
-def validate_user_data(data, required_fields=None):
-    """Comprehensive validation for user data"""
-    if required_fields is None:
-        required_fields = ['name', 'email', 'password']
-    
-    errors = []
-    
-    # Check for required fields
-    for field in required_fields:
-        if field not in data or not data[field]:
-            errors.append(f"{field.capitalize()} is required")
-    
-    if errors:
-        return False, errors
-    
-    # Sanitize inputs
-    name = sanitize_input(data.get('name', ''))
-    email = sanitize_input(data.get('email', ''))
-    password = data.get('password', '')
-    
-    # Validate name
-    name_valid, name_error = validate_name(name)
-    if not name_valid:
-        errors.append(name_error)
-    
-    # Validate email
-    email_valid, email_error = validate_email_format(email)
-    if not email_valid:
-        errors.append(f"Email: {email_error}")
-    
-    # Validate password (only for create_user and login)
-    if 'password' in required_fields:
-        password_valid, password_errors = validate_password_strength(password)
-        if not password_valid:
-            errors.extend(password_errors)
-    
-    return len(errors) == 0, errors 
\ No newline at end of file
+import re
+from functools import lru_cache
+from email_validator import validate_email, EmailNotValidError
+from app.config import Config
+
+class ValidationRules:
+    """Validation settings and patterns compiled once from the configuration"""
+    
+    def __init__(self, config):
+        self.min_password_length = config.MIN_PASSWORD_LENGTH
+        self.password_length_error = (
+            f"Password must be at least {config.MIN_PASSWORD_LENGTH} characters long"
+        )
+        password_checks = [
+            (config.REQUIRE_UPPERCASE, r'[A-Z]', "Password must contain at least one uppercase letter"),
+            (config.REQUIRE_LOWERCASE, r'[a-z]', "Password must contain at least one lowercase letter"),
+            (config.REQUIRE_NUMBERS, r'\d', "Password must contain at least one number"),
+            (config.REQUIRE_SPECIAL_CHARS, r'[!@#$%^&*(),.?":{}|<>]',
+             "Password must contain at least one special character"),
+        ]
+        self.password_checks = [
+            (re.compile(pattern).search, message)
+            for enabled, pattern, message in password_checks if enabled
+        ]
+        
+        self.min_name_length = config.MIN_NAME_LENGTH
+        self.max_name_length = config.MAX_NAME_LENGTH
+        self.name_too_short = f"Name must be at least {config.MIN_NAME_LENGTH} characters long"
+        self.name_too_long = f"Name cannot exceed {config.MAX_NAME_LENGTH} characters"
+        # Letters, spaces, hyphens and apostrophes
+        self.name_chars = re.compile(r"[a-zA-Z\s\-']+").fullmatch
+        
+        self.check_deliverability = config.EMAIL_CHECK_DELIVERABILITY
+
+_rules = ValidationRules(Config)
+
+def configure_validators(config):
+    """Rebuild the compiled rules, e.g. after the configuration changed"""
+    global _rules
+    _rules = ValidationRules(config)
+    _check_email.cache_clear()
+
+@lru_cache(maxsize=Config.EMAIL_VALIDATION_CACHE_SIZE)
+def _check_email(email, check_deliverability):
+    try:
+        validate_email(email, check_deliverability=check_deliverability)
+        return True, None
+    except EmailNotValidError as e:
+        return False, str(e)
+
+def validate_email_format(email):
+    """Validate email format using email-validator (results are cached)"""
+    if not isinstance(email, str):
+        return False, "Email must be a string"
+    return _check_email(email, _rules.check_deliverability)
+
+def validate_password_strength(password):
+    """Validate password strength"""
+    if not isinstance(password, str):
+        return False, ["Password must be a string"]
+    
+    rules = _rules
+    errors = []
+    
+    if len(password) < rules.min_password_length:
+        errors.append(rules.password_length_error)
+    
+    for search, message in rules.password_checks:
+        if not search(password):
+            errors.append(message)
+    
+    return len(errors) == 0, errors
+
+def validate_name(name):
+    """Validate user name"""
+    if not isinstance(name, str):
+        return False, "Name must be a string"
+    
+    rules = _rules
+    name = name.strip()
+    if not name:
+        return False, "Name cannot be empty"
+    
+    if len(name) < rules.min_name_length:
+        return False, rules.name_too_short
+    
+    if len(name) > rules.max_name_length:
+        return False, rules.name_too_long
+    
+    if not rules.name_chars(name):
+        return False, "Name can only contain letters, spaces, hyphens, and apostrophes"
+    
+    return True, None
+
+def parse_positive_int(value):
+    """Parse a positive integer query/path value, returning None if invalid"""
+    if value is None or not (value.isascii() and value.isdigit()) or int(value) <= 0:
+        return None
+    return int(value)
+
+def sanitize_input(data):
+    """Sanitize input data by trimming whitespace"""
+    if isinstance(data, str):
+        return data.strip()
+    return data
+
+def validate_user_data(data, required_fields=None):
+    """Comprehensive validation for user data"""
+    if required_fields is None:
+        required_fields = ['name', 'email', 'password']
+    
+    errors = []
+    
+    # Check for required fields
+    for field in required_fields:
+        if field not in data or not data[field]:
+            errors.append(f"{field.capitalize()} is required")
+    
+    if errors:
+        return False, errors
+    
+    # Sanitize inputs
+    name = sanitize_input(data.get('name', ''))
+    email = sanitize_input(data.get('email', ''))
+    password = data.get('password', '')
+    
+    # Validate name
+    name_valid, name_error = validate_name(name)
+    if not name_valid:
+        errors.append(name_error)
+    
+    # Validate email
+    email_valid, email_error = validate_email_format(email)
+    if not email_valid:
+        errors.append(f"Email: {email_error}")
+    
+    # Validate password (only for create_user and login)
+    if 'password' in required_fields:
+        password_valid, password_errors = validate_password_strength(password)
+        if not password_valid:
+            errors.extend(password_errors)
+    
+    return len(errors) == 0, errors
+
+def validate_many(records, required_fields=None):
+    """Validate a batch of user records in one call.
+    
+    Returns one (is_valid, errors) tuple per record, in order. Records that
+    are not JSON objects are reported as invalid rather than raising.
+    """
+    if required_fields is None:
+        required_fields = ['name', 'email', 'password']
+    return [
+        validate_user_data(record, required_fields) if isinstance(record, dict)
+        else (False, ['Invalid JSON object'])
+        for record in records
+    ]
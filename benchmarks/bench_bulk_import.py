@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Bulk import throughput benchmark.
+
+Compares one-at-a-time User.create() calls with User.bulk_create(), and
+measures POST /users/bulk end to end (validation and bcrypt included).
+Results are reported in rows/second.
+
+Usage: python benchmarks/bench_bulk_import.py [--rows N] [--endpoint-rows N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+
+# Deliverability checks do DNS lookups; keep the network out of the numbers
+Config.EMAIL_CHECK_DELIVERABILITY = False
+
+def make_rows(count, prefix):
+    return [("Bench User", f"{prefix}{i}@bench.io", b"not-a-real-hash") for i in range(count)]
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {count:>8} rows {elapsed:>8.3f}s {count / elapsed:>12.0f} rows/s")
+    return count / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='rows for the model-level runs')
+    parser.add_argument('--endpoint-rows', type=int, default=20, help='rows for the HTTP run (bcrypt bound)')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'bench.db')
+        
+        from app import create_app
+        from app.models.user import User
+        app = create_app()
+        
+        single = make_rows(min(args.rows, 2000), 'single')
+        timed('User.create (one per call)', len(single),
+              lambda: [User.create(*row) for row in single])
+        
+        bulk = make_rows(args.rows, 'bulk')
+        timed('User.bulk_create', len(bulk),
+              lambda: User.bulk_create(bulk, chunk_size=Config.BULK_CHUNK_SIZE))
+        
+        payload = [
+            {'name': 'Endpoint User', 'email': f'endpoint{i}@bench.io', 'password': 'BenchPass123!'}
+            for i in range(args.endpoint_rows)
+        ]
+        client = app.test_client()
+        def post_bulk():
+            response = client.post('/users/bulk', json=payload)
+            assert response.status_code == 200, response.get_json()
+            assert response.get_json()['data']['created'] == len(payload)
+        timed('POST /users/bulk', len(payload), post_bulk)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Group-commit benchmark.
+
+Runs concurrent User.create() and User.update() calls from many threads,
+first with one transaction per write (WRITE_BATCHING off) and then through
+the group-commit writer, and reports writes/second plus the writer's batch
+statistics. Use --synchronous FULL to see the effect of one fsync per
+commit on durable settings.
+
+Usage: python benchmarks/bench_group_commit.py [--threads N] [--writes N] [--synchronous MODE]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+
+def run(label, threads, writes_per_thread):
+    from app.models.user import User, WriteResult
+    failures = []
+    barrier = threading.Barrier(threads + 1)
+    
+    def worker(thread_id):
+        barrier.wait()
+        for i in range(writes_per_thread):
+            result, user_id = User.create('Group Commit', f'{label}-{thread_id}-{i}@bench.io', b'not-a-real-hash')
+            if result is not WriteResult.OK:
+                failures.append(result)
+                continue
+            if User.update(user_id, 'Group Committed', f'{label}-{thread_id}-{i}@bench.io') is not WriteResult.OK:
+                failures.append('update')
+    
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = threads * writes_per_thread * 2
+    print(f"{label:<16} {total:>8} writes {elapsed:>8.3f}s {total / elapsed:>10.0f} writes/s  failures {len(failures)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--writes', type=int, default=100, help='creates (each followed by an update) per thread')
+    parser.add_argument('--synchronous', default=Config.DB_SYNCHRONOUS, help='PRAGMA synchronous level')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'bench.db')
+        Config.DB_SYNCHRONOUS = args.synchronous
+        Config.DB_POOL_SIZE = max(Config.DB_POOL_SIZE, args.threads)
+        
+        from app.database.connection import init_database
+        from app.database.writer import get_writer_stats, shutdown_writer
+        init_database()
+        
+        Config.WRITE_BATCHING = False
+        run('per-write commit', args.threads, args.writes)
+        
+        Config.WRITE_BATCHING = True
+        run('group commit', args.threads, args.writes)
+        stats = get_writer_stats()
+        print(f"batches {stats['batches']}, average size {stats['avg_batch_size']:.1f}, "
+              f"largest {stats['max_batch_size']}")
+        shutdown_writer()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+JSON serialization benchmark.
+
+Times success_response() for a large user list with Flask's default JSON
+provider and with FastJSONProvider, the same list in the columnar format
+(column names once, one array per user), plus error responses built from
+a cached pre-encoded body versus jsonify.
+
+Usage: python benchmarks/bench_json.py [--users N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+from app.utils import responses
+from app.utils.responses import FastJSONProvider, constant_error_response, success_response
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    users = [{'id': i, 'name': f'User Number {i}', 'email': f'user{i}@example.com'} for i in range(args.users)]
+    encoder = 'orjson' if responses.orjson is not None else 'stdlib (compact)'
+    print(f"FastJSONProvider encoder: {encoder}")
+    
+    for label, provider in (('DefaultJSONProvider', DefaultJSONProvider), ('FastJSONProvider', FastJSONProvider)):
+        app = Flask(__name__)
+        app.json = provider(app)
+        with app.app_context():
+            elapsed = best_of(args.repeat, lambda: success_response(data={'users': users}))
+            size = len(success_response(data={'users': users})[0].get_data())
+        print(f"{label:<22} {args.users:>8} users {elapsed * 1000:>9.1f} ms {size / 1e6:>8.2f} MB")
+    
+    columns = ['id', 'name', 'email']
+    rows = [(user['id'], user['name'], user['email']) for user in users]
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    with app.app_context():
+        columnar = lambda: success_response(data={'columns': columns, 'users': rows})
+        elapsed = best_of(args.repeat, columnar)
+        size = len(columnar()[0].get_data())
+    print(f"{'Fast, columnar':<22} {args.users:>8} users {elapsed * 1000:>9.1f} ms {size / 1e6:>8.2f} MB")
+    
+    app = Flask(__name__)
+    with app.app_context():
+        count = 100000
+        elapsed = best_of(args.repeat, lambda: [
+            jsonify({'status': 'error', 'message': 'User not found'}) for _ in range(count)
+        ])
+        print(f"{'jsonify error body':<22} {elapsed * 1e6 / count:>10.2f} us/response")
+        elapsed = best_of(args.repeat, lambda: [
+            constant_error_response('User not found', 404) for _ in range(count)
+        ])
+        print(f"{'pre-encoded error body':<22} {elapsed * 1e6 / count:>10.2f} us/response")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Sharding benchmark.
+
+Runs the same workload against an unsharded database and against one
+split into --shards files: concurrent User.create() and User.update()
+calls from many threads, then keyset pages of User.get_all() and
+User.search_by_name(). A sharded create writes the directory and then a
+shard, an update writes only its shard, and reads fan out to every shard
+and merge. Sharding pays off once a single file's write lock, sync rate
+or size is the bottleneck; on one core with fast storage expect the
+extra hops to cost more than they save.
+
+Usage: python benchmarks/bench_sharding.py [--shards N] [--threads N] [--writes N] [--reads N] [--synchronous MODE]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+
+NAMES = ['Alice Walker', 'Bruno Diaz', 'Chen Wei', 'Dana Scully', 'Emil Novak', 'Farah Khan']
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {count:>8} ops {elapsed:>8.3f}s {count / elapsed:>10.0f} ops/s")
+
+def run_threads(worker, threads):
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+def run(shards, threads, writes_per_thread, reads, tmp):
+    Config.DB_SHARDS = shards
+    Config.DATABASE_PATH = os.path.join(tmp, f'bench{shards}.db')
+    from app.database.connection import close_pool, init_database
+    from app.database.writer import shutdown_writer
+    from app.models.user import User
+    init_database()
+    print(f"{shards} shard(s)")
+    
+    created = [[] for _ in range(threads)]
+    
+    def create():
+        def worker(thread_id):
+            for i in range(writes_per_thread):
+                _, user_id = User.create(NAMES[i % len(NAMES)], f'{thread_id}-{i}@bench.io', b'not-a-real-hash')
+                created[thread_id].append(user_id)
+        run_threads(worker, threads)
+    
+    def update():
+        def worker(thread_id):
+            for i, user_id in enumerate(created[thread_id]):
+                User.update(user_id, NAMES[(i + 1) % len(NAMES)], f'{thread_id}-{i}@bench.io')
+        run_threads(worker, threads)
+    
+    def list_pages():
+        after_id = None
+        for _ in range(reads):
+            page = User.get_all(after_id, 100)
+            after_id = page[-1]['id'] if len(page) == 100 else None
+    
+    def search():
+        for i in range(reads):
+            User.search_by_name(NAMES[i % len(NAMES)][:4], 20)
+    
+    timed('create', threads * writes_per_thread, create)
+    timed('update', threads * writes_per_thread, update)
+    timed('list', reads, list_pages)
+    timed('search', reads, search)
+    shutdown_writer()
+    close_pool()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200, help='creates per thread')
+    parser.add_argument('--reads', type=int, default=500, help='list pages and searches')
+    parser.add_argument('--synchronous', default=Config.DB_SYNCHRONOUS, help='PRAGMA synchronous level')
+    args = parser.parse_args()
+    
+    Config.DB_POOL_SIZE = max(Config.DB_POOL_SIZE, args.threads)
+    Config.DB_SYNCHRONOUS = args.synchronous
+    with tempfile.TemporaryDirectory() as tmp:
+        for shards in (1, args.shards):
+            run(shards, args.threads, args.writes, args.reads, tmp)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Validation microbenchmark.
+
+Reports the per-record cost of validate_user_data with a cold and a warm
+email cache, and of validate_many over a batch.
+
+Usage: python benchmarks/bench_validators.py [--records N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+
+# Deliverability checks do DNS lookups; keep the network out of the numbers
+Config.EMAIL_CHECK_DELIVERABILITY = False
+
+from app.utils.validators import configure_validators, validate_many, validate_user_data
+
+def per_record(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<36} {count:>8} records {elapsed * 1e6 / count:>10.2f} us/record")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=5000)
+    args = parser.parse_args()
+    
+    configure_validators(Config)
+    records = [
+        {'name': "Mary-Jane O'Neil", 'email': f'user{i}@bench.io', 'password': 'BenchPass123!'}
+        for i in range(args.records)
+    ]
+    
+    per_record('validate_user_data (cold email cache)', len(records),
+               lambda: [validate_user_data(record) for record in records])
+    per_record('validate_user_data (warm email cache)', len(records),
+               lambda: [validate_user_data(record) for record in records])
+    per_record('validate_many (warm email cache)', len(records),
+               lambda: validate_many(records))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Worker scaling benchmark for the pre-forking server.
+
+Starts `python main.py` with WORKERS=1 and then WORKERS=N against the same
+seeded database, drives GET /users?limit=100 from concurrent HTTP clients
+for a fixed time, and reports requests/second for each. A SIGHUP reload is
+sent halfway through the N-worker run to check that draining loses no
+requests, and SIGTERM must stop the server cleanly.
+
+Throughput is expected to grow with min(N, CPU count); the run fails
+(exit 1) when the speedup is below --efficiency of that, when any request
+fails, or when the server does not shut down cleanly.
+
+Usage: python benchmarks/bench_workers.py [--workers N] [--duration S] [--clients N]
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.config import Config
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def seed(database_path, users):
+    Config.DATABASE_PATH = database_path
+    from app.database.connection import close_pool, get_db_connection, init_database
+    init_database()
+    with get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+            ((f'Worker User', f'worker{i}@bench.io', b'not-a-real-hash') for i in range(users))
+        )
+        conn.commit()
+    close_pool()
+
+def start_server(workers, port, database_path):
+    env = dict(os.environ, WORKERS=str(workers), PORT=str(port), HOST='127.0.0.1',
+               DATABASE_PATH=database_path, DEBUG='false', GRACEFUL_TIMEOUT='10')
+    process = subprocess.Popen([sys.executable, 'main.py'], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"server with {workers} workers did not start")
+
+def drive(port, clients, duration, on_halfway=None):
+    """Send requests from `clients` threads for `duration` seconds; returns (requests, errors)"""
+    counts = [[0, 0] for _ in range(clients)]
+    stop = time.monotonic() + duration
+    
+    def client(slot):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.monotonic() < stop:
+            try:
+                conn.request('GET', '/users?limit=100')
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                ok = False
+            counts[slot][0 if ok else 1] += 1
+    
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(clients)]
+    for thread in threads:
+        thread.start()
+    if on_halfway:
+        time.sleep(duration / 2)
+        on_halfway()
+    for thread in threads:
+        thread.join()
+    return sum(ok for ok, _ in counts), sum(failed for _, failed in counts)
+
+def run(workers, args, database_path, reload_halfway=False):
+    port = free_port()
+    process = start_server(workers, port, database_path)
+    try:
+        reload = (lambda: process.send_signal(signal.SIGHUP)) if reload_halfway else None
+        ok, errors = drive(port, args.clients, args.duration, reload)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            exit_code = process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            exit_code = None
+    rate = ok / args.duration
+    print(f"{workers:>2} workers {rate:>10.1f} req/s  errors {errors}"
+          f"{'  (SIGHUP reload midway)' if reload_halfway else ''}  exit {exit_code}")
+    return rate, errors, exit_code
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=max(2, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per run')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent HTTP clients')
+    parser.add_argument('--users', type=int, default=2000, help='rows seeded into the database')
+    parser.add_argument('--efficiency', type=float, default=0.6,
+                        help='required fraction of the ideal min(workers, CPUs) speedup')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, 'workers.db')
+        seed(database_path, args.users)
+        
+        single, single_errors, single_exit = run(1, args, database_path)
+        multi, multi_errors, multi_exit = run(args.workers, args, database_path, reload_halfway=True)
+    
+    expected = min(args.workers, os.cpu_count() or 1)
+    speedup = multi / single if single else 0.0
+    print(f"speedup {speedup:.2f}x (ideal {expected}x on {os.cpu_count()} CPUs)")
+    
+    failures = []
+    if speedup < args.efficiency * expected:
+        failures.append(f"speedup below {args.efficiency:.0%} of ideal")
+    if single_errors or multi_errors:
+        failures.append("requests failed")
+    if single_exit != 0 or multi_exit != 0:
+        failures.append("server did not shut down cleanly")
+    if failures:
+        print("FAILED: " + "; ".join(failures))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
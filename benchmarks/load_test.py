@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Load test for the user management API.
+
+Seeds a fresh SQLite database with N users, then drives each user route
+(GET /users, GET /user/<id>, GET /search, POST /users, PUT /user/<id>,
+DELETE /user/<id>, POST /login) with a fixed number of requests spread
+over a pool of concurrent clients. Reports throughput and p50/p95/p99
+latency per scenario.
+
+Requests go through the Flask test client (--mode client, the default) or
+over HTTP to a threaded server started on a free local port (--mode server).
+Request parameters come from a seeded RNG, so a run is repeatable.
+--async-views runs the same scenarios against the async blueprint.
+
+Results can be stored as a JSON baseline (--save-baseline) and later runs
+compared against it; a throughput drop or p95 increase beyond --threshold
+fails the run with exit code 1. Baselines depend on the machine, so keep
+them next to the hardware they were recorded on.
+
+Usage: python benchmarks/load_test.py [--users N] [--requests N] [--concurrency N]
+                                      [--mode client|server] [--scenarios a,b]
+                                      [--baseline NAME] [--save-baseline] [--threshold F]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app.config import Config
+
+# Deliverability checks do DNS lookups; keep the network out of the numbers
+Config.EMAIL_CHECK_DELIVERABILITY = False
+# Every simulated client shares one address, which the login throttle would block
+Config.LOGIN_RATE_LIMIT_ENABLED = False
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+PASSWORD = 'LoadTest123!'
+SEARCH_TERMS = ('Load', 'User', 'oad', 'ser 1', 'er 42')
+NEW_NAMES = ('Updated User', 'Renamed User', 'Load Tester')  # Names may not contain digits
+
+class Scenario:
+    """One route under test: builds its requests and names the statuses that count as success"""
+    
+    def __init__(self, name, build, ok_statuses=(200,)):
+        self.name = name
+        self.build = build  # (rng, index, users) -> (method, path, json_body)
+        self.ok_statuses = ok_statuses
+
+def _email(user_id):
+    return f'user{user_id}@load.io'
+
+def _list_users(rng, index, users):
+    return 'GET', f'/users?after_id={rng.randint(1, users)}&limit=50', None
+
+def _get_user(rng, index, users):
+    return 'GET', f'/user/{rng.randint(1, users)}', None
+
+def _search(rng, index, users):
+    return 'GET', f'/search?name={rng.choice(SEARCH_TERMS).replace(" ", "%20")}&limit=20', None
+
+def _create_user(rng, index, users):
+    body = {'name': 'Created User', 'email': f'created{index}@load.io', 'password': PASSWORD}
+    return 'POST', '/users', body
+
+def _update_user(rng, index, users):
+    user_id = rng.randint(1, users)
+    return 'PUT', f'/user/{user_id}', {'name': rng.choice(NEW_NAMES), 'email': _email(user_id)}
+
+def _delete_user(rng, index, users):
+    # Deletes consume the rows seeded past `users`, one per request
+    return 'DELETE', f'/user/{users + index + 1}', None
+
+def _login(rng, index, users):
+    return 'POST', '/login', {'email': _email(rng.randint(1, users)), 'password': PASSWORD}
+
+SCENARIOS = [
+    Scenario('list_users', _list_users),
+    Scenario('get_user', _get_user),
+    Scenario('search', _search),
+    Scenario('create_user', _create_user, (201,)),
+    Scenario('update_user', _update_user),
+    Scenario('delete_user', _delete_user),
+    Scenario('login', _login),
+]
+
+def seed_users(count, rounds):
+    """Insert `count` users named 'Load User <id>' sharing one password hash"""
+    from app.database.connection import get_db_connection
+    hashed = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds))
+    with get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (id, name, email, password) VALUES (?, ?, ?, ?)",
+            ((i, f'Load User {i}', _email(i), hashed) for i in range(1, count + 1))
+        )
+        conn.commit()
+
+class ClientTransport:
+    """Sends requests through a Flask test client (one per thread)"""
+    
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+    
+    def send(self, method, path, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        response.close()
+        return response.status_code
+    
+    def close(self):
+        pass
+
+class _QuietHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like a real client
+    
+    def log_request(self, *args, **kwargs):
+        pass
+
+class ServerTransport:
+    """Sends requests over keep-alive HTTP connections to a local threaded server"""
+    
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=_QuietHandler)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        self._local = threading.local()
+    
+    def send(self, method, path, body):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection('127.0.0.1', self.port)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            return 0
+        return response.status
+    
+    def close(self):
+        self.server.shutdown()
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+def run_scenario(transport, scenario, requests, concurrency, users, seed):
+    """Send `requests` requests from `concurrency` threads; returns the result summary"""
+    rng = random.Random(f'{seed}-{scenario.name}')
+    planned = [scenario.build(rng, index, users) for index in range(requests)]
+    
+    def send(request):
+        start = time.perf_counter()
+        status = transport.send(*request)
+        return time.perf_counter() - start, status in scenario.ok_statuses
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(send, planned))
+    wall = time.perf_counter() - started
+    
+    latencies = sorted(latency for latency, _ in outcomes)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in outcomes if not ok),
+        'throughput': round(requests / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline; returns the regressed scenario names"""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline.get('created', '?')} (threshold {threshold:.0%}):")
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"  {name:<12} no baseline")
+            continue
+        throughput_change = (current['throughput'] - previous['throughput']) / previous['throughput']
+        p95_change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] if previous['p95_ms'] else 0.0
+        regressed = throughput_change < -threshold or p95_change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<12} throughput {throughput_change:+7.1%}  p95 {p95_change:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000, help='users seeded before the run')
+    parser.add_argument('--requests', type=int, default=2000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--mode', choices=('client', 'server'), default='client')
+    parser.add_argument('--async-views', action='store_true', help='serve the routes from the async blueprint')
+    parser.add_argument('--scenarios', default=','.join(s.name for s in SCENARIOS),
+                        help='comma-separated subset of: ' + ', '.join(s.name for s in SCENARIOS))
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help='bcrypt cost for seeded and created users (production uses BCRYPT_ROUNDS)')
+    parser.add_argument('--seed', type=int, default=1, help='RNG seed for request parameters')
+    parser.add_argument('--baseline', default='default', help='baseline name under benchmarks/baselines/')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='allowed throughput drop / p95 increase before failing (fraction)')
+    args = parser.parse_args()
+    
+    selected = args.scenarios.split(',')
+    unknown = set(selected) - {s.name for s in SCENARIOS}
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    settings = {
+        'users': args.users, 'requests': args.requests, 'concurrency': args.concurrency,
+        'mode': args.mode, 'bcrypt_rounds': args.bcrypt_rounds, 'seed': args.seed,
+        'async_views': args.async_views,
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        Config.DATABASE_PATH = os.path.join(tmp, 'load.db')
+        Config.BCRYPT_ROUNDS = args.bcrypt_rounds
+        Config.ASYNC_VIEWS = args.async_views
+        
+        from app import create_app
+        app = create_app()
+        # Extra rows past --users are the ones the delete scenario removes
+        seed_users(args.users + args.requests, args.bcrypt_rounds)
+        
+        transport = ClientTransport(app) if args.mode == 'client' else ServerTransport(app)
+        results = {}
+        print(f"{'scenario':<12} {'requests':>8} {'errors':>6} {'req/s':>10} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        try:
+            for scenario in SCENARIOS:
+                if scenario.name not in selected:
+                    continue
+                result = run_scenario(transport, scenario, args.requests, args.concurrency, args.users, args.seed)
+                results[scenario.name] = result
+                print(f"{scenario.name:<12} {result['requests']:>8} {result['errors']:>6} "
+                      f"{result['throughput']:>10.1f} {result['p50_ms']:>9.3f} "
+                      f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f}")
+        finally:
+            transport.close()
+    
+    path = os.path.join(BASELINE_DIR, f'{args.baseline}.json')
+    failed = [name for name, result in results.items() if result['errors']]
+    if args.save_baseline:
+        if failed:
+            # A baseline with failed requests would make every later run look fine
+            print(f"\nNot saving a baseline; scenarios with failed requests: {', '.join(failed)}")
+            return 1
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'settings': settings,
+                'results': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\nBaseline saved to {path}")
+        return 0
+    
+    if not os.path.exists(path):
+        print(f"\nNo baseline at {path}; run with --save-baseline to record one")
+        return 0
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != settings:
+        print(f"\nWarning: baseline was recorded with different settings: {baseline.get('settings')}")
+    
+    regressions = compare(results, baseline, args.threshold)
+    if failed:
+        print(f"Scenarios with failed requests: {', '.join(failed)}")
+    if regressions:
+        print(f"Regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+    return 1 if failed or regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,20 @@
-from app import create_app
-
-if __name__ == '__main__':
-    app = create_app()
-    print("🚀 Starting User Management System...")
-    print(f"📍 Server will be available at: http://{app.config['HOST']}:{app.config['PORT']}")
-    print("🛑 Press Ctrl+C to stop the server")
-    print("-" * 50)
-    
-    app.run(
-        host=app.config['HOST'],
-        port=app.config['PORT'],
-        debug=app.config['DEBUG']
-
-    )
+from app import create_app
+from app.server import serve
+
+if __name__ == '__main__':
+    app = create_app()
+    print("🚀 Starting User Management System...")
+    print(f"📍 Server will be available at: http://{app.config['HOST']}:{app.config['PORT']}")
+    print("🛑 Press Ctrl+C to stop the server")
+    print("-" * 50)
+    
+    if app.config['DEBUG']:
+        # Development server with the debugger and reloader
+        app.run(
+            host=app.config['HOST'],
+            port=app.config['PORT'],
+            debug=True
+        )
+    else:
+        # Pre-forked workers sharing one socket; the app is loaded once before forking
+        serve(app)
@@ -0,0 +1,38 @@
+import pytest
+from app.config import Config
+
+# No DNS lookups, no login throttling and cheap hashes in tests
+Config.EMAIL_CHECK_DELIVERABILITY = False
+Config.LOGIN_RATE_LIMIT_ENABLED = False
+Config.BCRYPT_ROUNDS = 4
+Config.BCRYPT_WORKERS = 0
+
+@pytest.fixture
+def shards():
+    """DB_SHARDS for the app fixture; parametrize a test over `shards` to change it"""
+    return 1
+
+@pytest.fixture
+def async_views():
+    """ASYNC_VIEWS for the app fixture; override it to run against the async blueprint"""
+    return False
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, shards, async_views):
+    """App on a fresh database in `tmp_path`"""
+    from app import create_app
+    from app.database.connection import close_pool
+    from app.database.writer import shutdown_writer
+    from app.models.user import _cache
+    
+    monkeypatch.setattr(Config, 'DATABASE_PATH', str(tmp_path / 'users.db'))
+    monkeypatch.setattr(Config, 'DB_SHARDS', shards)
+    monkeypatch.setattr(Config, 'ASYNC_VIEWS', async_views)
+    _cache.clear()
+    yield create_app()
+    shutdown_writer()
+    close_pool()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
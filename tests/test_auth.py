@@ -0,0 +1,49 @@
+import threading
+import time
+import pytest
+from app.utils.auth import AuthBusyError, BcryptPool
+
+# time.sleep stands in for a slow bcrypt call; it pickles to the spawned workers
+
+@pytest.fixture
+def pool():
+    pool = BcryptPool(workers=1, max_queue=4, timeout=3.0)
+    pool.run('warmup', time.sleep, 0)  # Start the worker process outside the timings
+    yield pool
+    pool.shutdown()
+
+def test_bulk_hashing_does_not_starve_single_jobs(pool):
+    """Test a job submitted during a long map waits for one item, not the whole batch"""
+    bulk = threading.Thread(target=pool.map, args=('hash_many', time.sleep, [0.1] * 30))
+    bulk.start()
+    time.sleep(0.3)
+    start = time.perf_counter()
+    pool.run('verify', time.sleep, 0)
+    waited = time.perf_counter() - start
+    bulk.join()
+    assert waited < 1.0
+
+def test_map_times_out(pool):
+    """Test a map whose items outlast the timeout is abandoned with AuthBusyError"""
+    pool.timeout = 0.2
+    with pytest.raises(AuthBusyError):
+        pool.map('hash_many', time.sleep, [1.0, 1.0, 1.0])
+    assert pool.stats()['timeouts'] == 1
+
+def test_timed_out_job_keeps_its_slot():
+    """Test a job that times out still counts against the queue until it finishes"""
+    small = BcryptPool(workers=1, max_queue=0, timeout=3.0)
+    try:
+        small.run('warmup', time.sleep, 0)
+        small.timeout = 0.2
+        with pytest.raises(AuthBusyError):
+            small.run('hash', time.sleep, 1.0)
+        # Still running in the worker, so the only slot is taken
+        with pytest.raises(AuthBusyError, match='full'):
+            small.run('hash', time.sleep, 0)
+        time.sleep(1.5)
+        small.timeout = 3.0
+        small.run('hash', time.sleep, 0)
+        assert small.stats()['in_flight'] == 0
+    finally:
+        small.shutdown()
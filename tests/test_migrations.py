@@ -0,0 +1,31 @@
+import sqlite3
+from app.database.migrations import MIGRATIONS, get_applied_versions, run_migrations
+
+class _NoFTS5Cursor:
+    """Cursor of a SQLite build compiled without FTS5"""
+    
+    def __init__(self, cursor):
+        self._cursor = cursor
+    
+    def execute(self, sql, *args):
+        if 'fts5' in sql:
+            raise sqlite3.OperationalError('no such module: fts5')
+        return self._cursor.execute(sql, *args)
+
+def test_search_index_is_created_once_fts5_is_available(tmp_path):
+    """Test a build without FTS5 leaves the index step pending instead of recording it"""
+    conn = sqlite3.connect(tmp_path / 'users.db')
+    without_fts5 = [
+        (version, description, lambda cursor, step=step: step(_NoFTS5Cursor(cursor)))
+        for version, description, step in MIGRATIONS
+    ]
+    assert run_migrations(conn, without_fts5) == [1, 3]
+    assert get_applied_versions(conn) == {1, 3}
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('Early User', 'early@example.com', 'hash')")
+    conn.commit()
+    
+    assert run_migrations(conn) == [2]
+    assert run_migrations(conn) == []
+    rows = conn.execute("SELECT rowid FROM users_fts WHERE users_fts MATCH 'Early'").fetchall()
+    assert rows == [(1,)]
+    conn.close()
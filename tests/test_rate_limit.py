@@ -0,0 +1,91 @@
+import pytest
+from types import SimpleNamespace
+from app.config import Config
+from app.utils import rate_limit
+from app.utils.rate_limit import TokenBucketLimiter
+
+class Clock:
+    """Stand-in for time.monotonic() that only moves when told to"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(monotonic=clock))
+    return clock
+
+@pytest.fixture(params=[False, True], ids=['sync', 'async'])
+def async_views(request):
+    return request.param
+
+@pytest.fixture
+def limited(monkeypatch):
+    """Login limiting switched back on, with fresh buckets allowing 2 attempts per email"""
+    monkeypatch.setattr(Config, 'LOGIN_RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(rate_limit, 'login_ip_limiter', TokenBucketLimiter(1, 20, 100))
+    monkeypatch.setattr(rate_limit, 'login_email_limiter', TokenBucketLimiter(1 / 60, 2, 100))
+
+def test_throttled_login_does_no_lookup_or_hashing(client, limited, monkeypatch):
+    """Test a login over budget gets 429 before the user is loaded or a hash is checked"""
+    from app.models.user import User
+    credentials = {'email': 'user@example.com', 'password': 'WrongPass123!'}
+    assert client.post('/users', json={
+        'name': 'Test User', 'email': credentials['email'], 'password': 'SecurePass123!'
+    }).status_code == 201
+    assert [client.post('/login', json=credentials).status_code for _ in range(2)] == [401, 401]
+    
+    def not_reached(*args):
+        pytest.fail('throttled login did work')
+    monkeypatch.setattr(User, 'get_by_email', not_reached)
+    monkeypatch.setattr('app.routes.user_routes.verify_password', not_reached)
+    monkeypatch.setattr('app.routes.async_user_routes.verify_password_async', not_reached)
+    
+    response = client.post('/login', json=credentials)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert rate_limit.get_login_rate_stats()['email_rejected'] == 1
+    assert 'login_rate_limit_email_rejected 1' in client.get('/metrics').get_data(as_text=True)
+
+def test_buckets_refill_over_time(clock):
+    """Test a drained bucket regains `rate` attempts per second, up to `burst`"""
+    limiter = TokenBucketLimiter(rate=0.5, burst=2, max_keys=10)
+    assert [limiter.hit('key') for _ in range(2)] == [0, 0]
+    assert limiter.hit('key') == pytest.approx(2.0)
+    
+    clock.now += 2
+    assert limiter.hit('key') == 0
+    assert limiter.hit('key') > 0
+    
+    # However long it idles, a bucket never holds more than `burst`
+    clock.now += 60
+    assert [limiter.hit('key') for _ in range(2)] == [0, 0]
+    assert limiter.hit('key') > 0
+
+def test_keys_are_bounded_and_idle_ones_cleaned_up(clock):
+    """Test the least recently used bucket is evicted at max_keys and full buckets are dropped"""
+    limiter = TokenBucketLimiter(rate=1, burst=2, max_keys=3, cleanup_interval=10)
+    for key in 'abcd':
+        limiter.hit(key)
+    assert limiter.stats()['tracked_keys'] == 3
+    assert limiter.stats()['evicted'] == 1
+    assert 'a' not in limiter._buckets
+    
+    # 'b' and 'c' have been idle past the 2 s refill time by the next cleanup; 'd' has not
+    clock.now += 9
+    limiter.hit('d')
+    clock.now += 1.5
+    limiter.hit('e')
+    assert list(limiter._buckets) == ['d', 'e']
+    assert limiter.stats()['evicted'] == 1
+
+def test_rejected_attempts_are_counted(clock):
+    """Test allowed and rejected attempts are counted separately"""
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=10)
+    results = [limiter.hit('key') for _ in range(3)]
+    assert results[0] == 0 and all(results[1:])
+    assert limiter.stats() == {'tracked_keys': 1, 'allowed': 1, 'rejected': 2, 'evicted': 0}
@@ -0,0 +1,132 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pytest
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason='the pre-forking server needs fork()')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVE = 'from app import create_app; from app.server import serve; serve(create_app())'
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def server(app):
+    """Start app/server.py with N workers on the app fixture's database, seeded with 200 users"""
+    from app.config import Config
+    from app.database.connection import get_db_connection
+    with get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (name, email, password) VALUES (?, ?, ?)",
+            (('Worker User', f'worker{i}@example.com', b'not-a-real-hash') for i in range(200))
+        )
+        conn.commit()
+    processes = []
+    
+    def start(workers):
+        port = free_port()
+        env = dict(os.environ, WORKERS=str(workers), PORT=str(port), HOST='127.0.0.1', DEBUG='false',
+                   DATABASE_PATH=Config.DATABASE_PATH, GRACEFUL_TIMEOUT='10',
+                   EMAIL_CHECK_DELIVERABILITY='false', BCRYPT_ROUNDS='13')
+        process = subprocess.Popen([sys.executable, '-c', SERVE], cwd=ROOT, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        processes.append(process)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+                conn.request('GET', '/')
+                if conn.getresponse().status == 200:
+                    return process, port
+            except OSError:
+                time.sleep(0.1)
+        pytest.fail(f'server with {workers} workers did not start')
+    
+    yield start
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+def drive(port, clients, duration, halfway=None):
+    """GET /users?limit=100 from `clients` threads for `duration` seconds; returns (ok, failed)"""
+    counts = [[0, 0] for _ in range(clients)]
+    stop = time.monotonic() + duration
+    
+    def client(slot):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.monotonic() < stop:
+            try:
+                conn.request('GET', '/users?limit=100')
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                ok = False
+            counts[slot][0 if ok else 1] += 1
+    
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(clients)]
+    for thread in threads:
+        thread.start()
+    if halfway:
+        time.sleep(duration / 2)
+        halfway()
+    for thread in threads:
+        thread.join()
+    return sum(ok for ok, _ in counts), sum(failed for _, failed in counts)
+
+def signup(port, index, statuses):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('POST', '/users', body=(
+            f'{{"name": "Signup User", "email": "signup{index}@example.com", "password": "SecurePass123!"}}'
+        ), headers={'Content-Type': 'application/json'})
+        statuses[index] = conn.getresponse().status
+    except (http.client.HTTPException, OSError) as e:
+        statuses[index] = repr(e)
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_reload_and_stop_lose_no_requests(server, workers):
+    """Test a SIGHUP reload under load and a SIGTERM during signups drop no request"""
+    process, port = server(workers)
+    ok, failed = drive(port, clients=4, duration=2.0, halfway=lambda: process.send_signal(signal.SIGHUP))
+    assert ok and not failed
+    
+    # The signups are still hashing their passwords when the stop arrives
+    statuses = {}
+    threads = [threading.Thread(target=signup, args=(port, index, statuses)) for index in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    process.send_signal(signal.SIGTERM)
+    for thread in threads:
+        thread.join()
+    assert statuses == {0: 201, 1: 201}
+    assert process.wait(timeout=30) == 0
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason='scaling needs at least 2 CPUs')
+def test_throughput_scales_with_workers(server):
+    """Test N workers serve more requests per second than one, in line with the CPU count"""
+    workers = min(4, os.cpu_count())
+    rates = []
+    for count in (1, workers):
+        process, port = server(count)
+        ok, failed = drive(port, clients=16, duration=3.0)
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+        assert not failed
+        rates.append(ok / 3.0)
+    
+    speedup = rates[1] / rates[0]
+    print(f"1 worker {rates[0]:.0f} req/s, {workers} workers {rates[1]:.0f} req/s ({speedup:.2f}x)")
+    # Leave room for the clients, which share the same CPUs
+    assert speedup >= 0.5 * workers
@@ -0,0 +1,36 @@
+import pytest
+
+@pytest.fixture
+def shards():
+    return 2
+
+def test_concurrent_email_changes_keep_directory_and_shard_in_step(app, monkeypatch):
+    """Test two updates of one user racing on its email leave no stray reservation"""
+    from app.database.connection import get_db_connection
+    from app.database.sharding import shard_for_id
+    from app.models import user as user_module
+    from app.models.user import User, WriteResult
+    
+    assert User.create('Test User', 'x@example.com', 'hash')[0] == WriteResult.OK
+    run_write = user_module.run_write
+    racing = {}
+    
+    def interleaved(func, *args, shard=None):
+        # The second update runs between the first one's directory move and its shard write
+        if shard is not None and 'second' not in racing:
+            racing['second'] = None
+            racing['second'] = User.update(1, 'Test User', 'c@example.com')
+        return run_write(func, *args, shard=shard)
+    
+    monkeypatch.setattr(user_module, 'run_write', interleaved)
+    first = User.update(1, 'Test User', 'b@example.com')
+    monkeypatch.setattr(user_module, 'run_write', run_write)
+    
+    assert (first, racing['second']) == (WriteResult.OK, WriteResult.CONFLICT)
+    with get_db_connection() as conn:
+        directory = conn.execute("SELECT email FROM user_directory WHERE id = 1").fetchone()['email']
+    with get_db_connection(shard_for_id(1)) as conn:
+        stored = conn.execute("SELECT email FROM users WHERE id = 1").fetchone()['email']
+    assert directory == stored == 'b@example.com'
+    assert User.create('Other User', 'c@example.com', 'hash')[0] == WriteResult.OK
+    assert User.create('Other User', 'b@example.com', 'hash')[0] == WriteResult.CONFLICT
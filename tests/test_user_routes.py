@@ -0,0 +1,150 @@
+import pytest
+import time
+
+@pytest.fixture(params=[False, True], ids=['sync', 'async'])
+def async_views(request):
+    """Run every route test against both blueprints"""
+    return request.param
+
+def create_users(client, count):
+    """POST `count` users named 'Test User A', 'Test User B', ...; returns their emails"""
+    emails = []
+    for index in range(count):
+        email = f'user{index}@example.com'
+        response = client.post('/users', json={
+            'name': f'Test User {chr(65 + index % 26)}', 'email': email, 'password': 'SecurePass123!'
+        })
+        assert response.status_code == 201
+        emails.append(email)
+    return emails
+
+@pytest.mark.parametrize('shards', [1, 2])
+def test_keyset_pages_end_with_an_empty_page(client, shards):
+    """Test a cursor past the last user gets an empty page, not an error"""
+    create_users(client, 4)
+    
+    first = client.get('/users?limit=2').get_json()['data']
+    assert len(first['users']) == 2
+    second = client.get(f"/users?after_id={first['next_after_id']}&limit=2").get_json()['data']
+    assert len(second['users']) == 2
+    
+    # The last page was exactly full, so it still hands out a cursor
+    response = client.get(f"/users?after_id={second['next_after_id']}&limit=2")
+    assert response.status_code == 200
+    assert response.get_json()['data']['users'] == []
+    assert response.get_json()['data']['next_after_id'] is None
+    
+    for query in ('after_id=100&limit=10', 'after_id=100&limit=10&format=columnar'):
+        response = client.get(f'/users?{query}')
+        assert response.status_code == 200
+        assert response.get_json()['data']['next_after_id'] is None
+
+@pytest.mark.parametrize('path', ['/users?after_id=%C2%B2', '/users?limit=%D9%A3', '/user/%C2%B2'])
+def test_non_ascii_digits_are_rejected(client, path):
+    """Test unicode digits in ids and paging args get a client error, not a 500"""
+    assert client.get(path).status_code in (400, 404)
+
+def test_user_etag_matches_the_body_served(client, monkeypatch):
+    """Test a user's ETag follows the (possibly cached) row, with no version query"""
+    from app.database.connection import get_db_connection
+    from app.models.user import User, _cache
+    create_users(client, 1)
+    monkeypatch.setattr(User, 'get_version', lambda: pytest.fail('version queried'))
+    
+    first = client.get('/user/1')
+    etag = first.headers['ETag']
+    assert client.get('/user/1', headers={'If-None-Match': etag}).status_code == 304
+    
+    # Another process renames the user; this one still serves its cached row
+    with get_db_connection() as conn:
+        conn.execute("UPDATE users SET name = 'Renamed User' WHERE id = 1")
+        conn.commit()
+    assert client.get('/user/1').headers['ETag'] == etag
+    
+    _cache.clear()
+    response = client.get('/user/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data']['user']['name'] == 'Renamed User'
+    assert response.headers['ETag'] != etag
+
+def test_list_is_revalidated_by_etag_only(client):
+    """Test a write in the same second as a listing is never answered with 304"""
+    create_users(client, 1)
+    first = client.get('/users')
+    assert 'Last-Modified' not in first.headers
+    assert client.get('/users', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    
+    assert client.put('/user/1', json={'name': 'Renamed User', 'email': 'user0@example.com'}).status_code == 200
+    response = client.get('/users', headers={
+        'If-None-Match': first.headers['ETag'], 'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'
+    })
+    assert response.status_code == 200
+    assert response.get_json()['data']['users'][0]['name'] == 'Renamed User'
+    assert client.get('/users', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}).status_code == 200
+
+def test_login_sees_writes_from_other_workers(client):
+    """Test a user deleted by another process cannot log in from this one's cache"""
+    from app.database.connection import get_db_connection
+    credentials = {'email': create_users(client, 1)[0], 'password': 'SecurePass123!'}
+    assert client.post('/login', json=credentials).status_code == 200
+    
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM users WHERE id = 1")
+        conn.commit()
+    assert client.post('/login', json=credentials).status_code == 404
+
+def test_bulk_import_throughput(client):
+    """Test a few thousand rows import with a per-row report, and print rows/s"""
+    existing = create_users(client, 1)[0]
+    rows = [
+        {'name': 'Bulk User', 'email': f'bulk{index}@example.com', 'password': 'SecurePass123!'}
+        for index in range(2000)
+    ]
+    rows[10]['email'] = existing
+    rows[20]['email'] = rows[19]['email']
+    rows[30]['password'] = 'short'
+    
+    start = time.perf_counter()
+    response = client.post('/users/bulk', json=rows)
+    elapsed = time.perf_counter() - start
+    print(f"POST /users/bulk: {len(rows)} rows in {elapsed:.2f}s ({len(rows) / elapsed:.0f} rows/s)")
+    
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert (data['created'], data['failed']) == (len(rows) - 3, 3)
+    assert [result['index'] for result in data['results']] == list(range(len(rows)))
+    failed = {result['index']: result['status'] for result in data['results'] if result['status'] != 'created'}
+    assert failed == {10: 'conflict', 20: 'conflict', 30: 'invalid'}
+    # The existing user has id 1, so the imported rows end at id len(rows) - 2
+    last = client.get(f'/users?limit=2&after_id={len(rows) - 3}').get_json()['data']['users']
+    assert [user['id'] for user in last] == [len(rows) - 2]
+
+def test_serves_the_selected_blueprint(app, async_views):
+    """Test ASYNC_VIEWS picks the blueprint the routes come from"""
+    assert ('async_users' in app.blueprints) == async_views
+    assert ('users' in app.blueprints) != async_views
+
+def test_user_lifecycle(client):
+    """Test create, read, update, search, login, bulk import and delete"""
+    create_users(client, 1)
+    assert client.post('/users', json={
+        'name': 'Other User', 'email': 'user0@example.com', 'password': 'SecurePass123!'
+    }).status_code == 409
+    
+    assert client.put('/user/1', json={'name': 'Renamed User', 'email': 'renamed@example.com'}).status_code == 200
+    assert client.get('/user/1').get_json()['data']['user']['name'] == 'Renamed User'
+    assert client.get('/search?name=Renamed').get_json()['data']['users'][0]['id'] == 1
+    
+    login = client.post('/login', json={'email': 'renamed@example.com', 'password': 'SecurePass123!'})
+    assert login.status_code == 200
+    token = login.get_json()['data']['token']
+    assert client.get('/me', headers={'Authorization': f'Bearer {token}'}).get_json()['data']['user']['id'] == 1
+    
+    bulk = client.post('/users/bulk', json=[
+        {'name': 'Bulk User', 'email': 'bulk@example.com', 'password': 'SecurePass123!'},
+        {'name': 'Bulk User', 'email': 'renamed@example.com', 'password': 'SecurePass123!'},
+    ]).get_json()['data']
+    assert [result['status'] for result in bulk['results']] == ['created', 'conflict']
+    
+    assert client.delete('/user/1').status_code == 200
+    assert client.get('/user/1').status_code == 404
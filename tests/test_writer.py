@@ -0,0 +1,53 @@
+import sqlite3
+import threading
+import time
+import pytest
+from app.config import Config
+from app.database.connection import get_db_connection
+from app.database.writer import WriteTimeoutError, get_writer, run_write
+
+def _slow_write(conn, seconds):
+    time.sleep(seconds)
+
+def _insert(conn, email):
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('Test User', ?, 'x')", (email,))
+
+def _count(email):
+    with get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM users WHERE email = ?", (email,)).fetchone()[0]
+
+def test_timed_out_write_is_not_applied(app, monkeypatch):
+    """Test a write that times out in the queue is skipped, not committed later"""
+    monkeypatch.setattr(Config, 'WRITE_TIMEOUT', 0.2)
+    get_writer().submit(_slow_write, 0.6)  # Keeps the writer busy past the timeout
+    time.sleep(0.05)
+    with pytest.raises(WriteTimeoutError):
+        run_write(_insert, 'late@example.com')
+    time.sleep(0.8)
+    assert _count('late@example.com') == 0
+    
+    run_write(_insert, 'next@example.com')
+    assert _count('next@example.com') == 1
+
+def test_submits_racing_shutdown_are_resolved(app):
+    """Test every submit either fails fast or gets an outcome when the writer stops"""
+    writer = get_writer()
+    futures = []
+    rejected = []
+    
+    def submitter(index):
+        try:
+            futures.append(writer.submit(_insert, f'race{index}@example.com'))
+        except sqlite3.OperationalError:
+            rejected.append(index)
+    
+    threads = [threading.Thread(target=submitter, args=(i,)) for i in range(50)]
+    for thread in threads[:25]:
+        thread.start()
+    writer.shutdown(5)
+    for thread in threads[25:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(futures) + len(rejected) == 50
+    assert all(future.done() for future in futures)